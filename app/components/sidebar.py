@@ -3,11 +3,8 @@ from typing import Any, Dict
 
 import streamlit as st
 from database.repository import message_repository
-from retrieval.vector_store import (
-    add_pdfs_to_vector_store,
-    delete_document_from_vector_store,
-    rename_document_in_vector_store,
-)
+from retrieval.ingest_queue import JobStatus, ingestion_queue
+from retrieval.vector_store import list_indexed_documents
 
 DATA_DIR = "app/storage/raw"
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -163,13 +160,9 @@ def rename_file(old_path: str, new_name_key: str):
         return
 
     try:
-        empty_space = st.empty()
-        with empty_space.container():
-            with st.status(f"'{new_name}'으로 변경 및 색인 업데이트 중..."):
-                os.rename(old_path, new_path)
-                # Use optimized rename
-                rename_document_in_vector_store(old_path, new_path)
-        empty_space.empty()
+        os.rename(old_path, new_path)
+        # 색인 갱신은 백그라운드 워커에서 처리
+        ingestion_queue.submit_rename(old_path, new_path)
         st.toast(f"'{new_name}' 변경되었습니다!", icon="✅")
     except Exception as e:
         st.toast(f"오류: {e}", icon="❌")
@@ -177,19 +170,83 @@ def rename_file(old_path: str, new_name_key: str):
 
 def delete_file(path: str, filename: str):
     try:
-        with st.spinner(f"'{filename}' 삭제 및 색인 정리 중..."):
-            os.remove(path)
-            # Use optimized delete
-            delete_document_from_vector_store(filename)
+        os.remove(path)
+        # 색인 정리는 백그라운드 워커에서 처리
+        ingestion_queue.submit_delete(filename)
 
         st.toast(f"'{filename}' 삭제되었습니다!", icon="✅")
     except Exception as e:
         st.toast(f"오류: {e}", icon="❌")
 
 
+JOB_STATUS_DISPLAY = {
+    JobStatus.QUEUED: "⏳ 대기 중",
+    JobStatus.PARSING: "📄 PDF 분석 중",
+    JobStatus.EMBEDDING: "🧮 임베딩 중",
+    JobStatus.SUMMARIZING: "📝 요약 생성 중",
+    JobStatus.INDEXED: "✅ 완료",
+    JobStatus.FAILED: "❌ 실패",
+}
+
+
+@st.fragment(run_every=2)
+def render_ingestion_jobs():
+    """색인 작업 상태를 주기적으로 폴링 (스크립트를 막지 않음)"""
+    jobs = ingestion_queue.jobs()[:5]
+    if not jobs:
+        return
+
+    st.markdown("#### 색인 작업")
+    for job in jobs:
+        label = (
+            f"{JOB_STATUS_DISPLAY.get(job['status'], job['status'])} · {job['label']}"
+        )
+        if job["status"] == JobStatus.FAILED:
+            st.caption(f"{label}: {job['error']}")
+        elif job["status"] == JobStatus.INDEXED:
+            st.caption(label)
+        else:
+            st.progress(job["progress"], text=label)
+
+    # 작업이 끝나면 파일 목록 등 전체 화면을 한 번 갱신
+    # (요약 작업은 파일 목록을 바꾸지 않으므로 제외)
+    finished = {
+        job["id"]
+        for job in jobs
+        if job["status"] == JobStatus.INDEXED and job["kind"] != "summary"
+    }
+    if "seen_finished_jobs" not in st.session_state:
+        st.session_state.seen_finished_jobs = finished
+    seen = st.session_state.seen_finished_jobs
+    if finished - seen:
+        seen.update(finished)
+        st.rerun(scope="app")
+
+
+def render_active_documents_ui():
+    """RAG/요약에 사용할 문서 선택 (선택하지 않으면 전체 문서 검색)"""
+    indexed = sorted(list_indexed_documents())
+    if not indexed:
+        return
+
+    # 삭제되거나 이름이 바뀐 문서는 선택 목록에서 제거
+    selected = st.session_state.get("active_documents", [])
+    st.session_state.active_documents = [name for name in selected if name in indexed]
+
+    st.multiselect(
+        "검색할 문서",
+        options=indexed,
+        key="active_documents",
+        placeholder="전체 문서",
+        help="선택한 PDF 안에서만 검색하고 요약합니다. 비워두면 전체 문서를 사용합니다.",
+    )
+
+
 def render_artifacts_ui():
     st.markdown("### VectorDB 추가된 PDF")
 
+    render_ingestion_jobs()
+
     # List PDF files in the data directory
     pdf_files = [f for f in os.listdir(DATA_DIR) if f.lower().endswith(".pdf")]
 
@@ -197,6 +254,7 @@ def render_artifacts_ui():
         st.info("📄 PDF 파일을 업로드하여 추가할 수 있습니다.")
     else:
         st.write("저장된 파일 목록:")
+        indexed = list_indexed_documents()
 
         # Grid layout for better spacing
         for pdf_file in pdf_files:
@@ -210,6 +268,14 @@ def render_artifacts_ui():
                 # Just display filename
                 st.write(f"📄 {pdf_file}")
                 st.caption(f"{size / (1024 * 1024):.2f} MB")
+                duplicate_of = indexed.get(pdf_file, {}).get("duplicate_of")
+                if duplicate_of:
+                    st.caption(f"♻️ '{duplicate_of}'와 거의 같은 문서")
+                resume_page = indexed.get(pdf_file, {}).get("resume_page")
+                if resume_page is not None:
+                    st.caption(
+                        f"⏸️ {resume_page}페이지까지 색인됨 (재색인 시 이어서 진행)"
+                    )
 
             with col2:
                 # Management Menu
@@ -250,29 +316,47 @@ def render_artifacts_ui():
 
         st.info(f"총 파일: {len(pdf_files)}개")
 
+        # 폴더와 색인을 맞추고, 체크포인트에서 멈춘 문서는 이어서 색인
+        if st.button(
+            "전체 재색인",
+            key="btn_rebuild_index",
+            help="추가/변경/삭제된 PDF만 다시 색인하고 중단된 색인을 이어서 진행합니다.",
+            use_container_width=True,
+        ):
+            ingestion_queue.submit_rebuild()
+            st.toast("재색인 작업을 시작했습니다.", icon="⏳")
+            st.rerun()
+
+    render_active_documents_ui()
+
     # PDF 업로드 섹션
     st.markdown("### PDF 추가")
-    uploaded_file = st.file_uploader(
+    uploaded_files = st.file_uploader(
         "PDF 파일을 선택하세요",
         type=["pdf"],
         key="pdf_uploader",
-        help="논문 PDF 파일을 업로드할 수 있습니다.",
+        accept_multiple_files=True,
+        help="논문 PDF 파일을 여러 개 한 번에 업로드할 수 있습니다.",
     )
 
-    if uploaded_file is not None:
+    if uploaded_files:
         if st.button("PDF 추가", key="add_pdf_button"):
-            file_path = os.path.join(DATA_DIR, uploaded_file.name)
-            if os.path.exists(file_path):
-                st.warning(f"⚠️ '{uploaded_file.name}' 이미 존재하는 파일입니다.")
-            else:
+            new_paths = []
+            for uploaded_file in uploaded_files:
+                file_path = os.path.join(DATA_DIR, uploaded_file.name)
+                if os.path.exists(file_path):
+                    st.warning(f"⚠️ '{uploaded_file.name}' 이미 존재하는 파일입니다.")
+                    continue
                 with open(file_path, "wb") as f:
                     f.write(uploaded_file.read())
-
-                # Update Vector Store
-                with st.spinner("임베딩 처리 중..."):
-                    add_pdfs_to_vector_store([file_path])
-
-                st.success(f"✅ '{uploaded_file.name}' 저장 및 색인 완료!")
+                new_paths.append(file_path)
+
+            if new_paths:
+                # Update Vector Store in the background worker
+                ingestion_queue.submit_add(new_paths)
+                st.toast(
+                    f"{len(new_paths)}개 파일 색인 작업을 시작했습니다.", icon="⏳"
+                )
                 st.rerun()
 
 
@@ -1,14 +1,29 @@
+import time
 import uuid
+from typing import Optional
 
 import streamlit as st
 from components.sidebar import render_sidebar
 from database.repository import message_repository
 from database.session import db_session
+from langchain_core.messages import AIMessageChunk
 from langfuse.langchain import CallbackHandler
+from utils.config import get_http_stats
 from utils.state_manager import init_session_state
 from workflow.graph import create_workflow
+from workflow.mcp_pool import arxiv_mcp_pool, exa_mcp_pool
 from workflow.state import AgentType, RootState
 
+# 답변 토큰을 화면에 바로 보여줄 에이전트와 그 내부의 답변 생성 노드
+# (라우팅, 중간 요약, 도구 호출은 제외; create_agent는 "model", ReAct는 "agent")
+STREAMING_AGENTS = {
+    AgentType.GENERAL,
+    AgentType.SEARCH,
+    AgentType.SUMMARY,
+    AgentType.RAG,
+}
+ANSWER_NODES = {"generate_response", "model", "agent"}
+
 
 def process_message_chunk(chunk, current_status):
     """Process streaming chunks from workflow execution
@@ -63,6 +78,12 @@ def process_message_chunk(chunk, current_status):
                 if step_name in step_display:
                     subgraph_step = step_display[step_name]
 
+                # 이번 턴 프롬프트 토큰 수 표시
+                if step_name == "prepare_messages" and isinstance(step_data, dict):
+                    total = (step_data.get("token_usage") or {}).get("total")
+                    if total:
+                        subgraph_step += f" (프롬프트 {total:,} 토큰)"
+
                 # Check if this chunk contains a response in 'update_state' step
                 if step_name == "update_state" and isinstance(step_data, dict):
                     response = step_data.get("response")
@@ -85,15 +106,33 @@ def process_message_chunk(chunk, current_status):
     return current_status.get("agent"), None, None
 
 
+def extract_answer_token(namespace, data) -> Optional[str]:
+    """Return the answer text in a ``messages`` stream chunk, if any.
+
+    Args:
+        namespace: Subgraph namespace of the chunk, e.g. ('RAG_AGENT:id',)
+        data: (message chunk, metadata) tuple from the messages stream mode
+    """
+    message, metadata = data
+    if not isinstance(message, AIMessageChunk) or message.tool_call_chunks:
+        return None
+    if not namespace or namespace[0].split(":")[0] not in STREAMING_AGENTS:
+        return None
+    if metadata.get("langgraph_node") not in ANSWER_NODES:
+        return None
+    return message.text or None
+
+
 def invoke_workflow():
-    """Execute the workflow and display agent status with subgraph steps
+    """Execute the workflow, streaming the answer below the agent status
 
     Returns:
         The final response text
     """
     session_id = str(uuid.uuid4())
 
-    workflow = create_workflow(session_id=session_id)
+    # 컴파일된 워크플로는 프로세스에서 한 번만 만들고, 세션 ID는 실행 설정으로 전달
+    workflow = create_workflow()
 
     # Get rag_enabled from session state, default to False
     rag_enabled = st.session_state.get("rag_enabled", False)
@@ -102,6 +141,7 @@ def invoke_workflow():
         "messages": st.session_state.messages,
         "prev_node": "",
         "rag_enabled": rag_enabled,
+        "active_documents": st.session_state.get("active_documents", []),
     }
 
     langfuse_handler = CallbackHandler()
@@ -109,55 +149,115 @@ def invoke_workflow():
     current_status = {}
     status_obj = None
     step_placeholder = None
+    # 상태 표시를 답변보다 위에 두기 위해 자리를 먼저 잡음
+    status_area = st.empty()
+    answer_area = st.empty()
+    started = time.perf_counter()
+    first_token_at = None
+    http_before = get_http_stats()
+
+    def answer_tokens():
+        nonlocal final_response, status_obj, step_placeholder, first_token_at
+
+        for chunk in workflow.stream(
+            initial_state,
+            config={
+                "callbacks": [langfuse_handler],
+                "metadata": {
+                    "session_id": session_id,
+                    "langfuse_session_id": session_id,
+                },
+            },
+            subgraphs=True,
+            stream_mode=["updates", "custom", "messages"],
+        ):
+            namespace, mode, data = chunk
+
+            # 답변 생성 중인 LLM 토큰
+            if mode == "messages":
+                token = extract_answer_token(namespace, data)
+                if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield token
+                continue
+
+            # 에이전트가 직접 보내는 진행 상황 (예: 문서별 요약 진행률)
+            if mode == "custom":
+                if step_placeholder and isinstance(data, dict) and data.get("status"):
+                    with step_placeholder:
+                        st.write(data["status"])
+                continue
+
+            # Process each chunk
+            _, subgraph_step, response = process_message_chunk(
+                (namespace, data), current_status
+            )
 
-    for chunk in workflow.stream(
-        initial_state,
-        config={
-            "callbacks": [langfuse_handler],
-            "metadata": {"session_id": session_id},
-        },
-        subgraphs=True,
-        stream_mode="updates",
-    ):
-        # Process each chunk
-        agent_name, subgraph_step, response = process_message_chunk(chunk, current_status)
-
-        # Update status display
-        if current_status.get("agent") and current_status.get("emoji_name"):
-            emoji_name = current_status["emoji_name"]
-            status_text = current_status["status_text"]
-
-            # Create or update status
-            if status_obj:
-                status_obj.update(
-                    label=f"{emoji_name} - {status_text}", state="running"
-                )
-            else:
-                status_obj = st.status(
-                    f"{emoji_name} - {status_text}", state="running", expanded=False
-                )
-                # Create placeholder inside status for subgraph steps
-                with status_obj:
-                    step_placeholder = st.empty()
-
-        # Display subgraph step inside the status
-        if subgraph_step and step_placeholder:
-            with step_placeholder:
-                st.write(subgraph_step)
-
-        # Track final response
-        if response:
-            final_response = response
+            # Update status display
+            if current_status.get("agent") and current_status.get("emoji_name"):
+                emoji_name = current_status["emoji_name"]
+                status_text = current_status["status_text"]
+
+                # Create or update status
+                if status_obj:
+                    status_obj.update(
+                        label=f"{emoji_name} - {status_text}", state="running"
+                    )
+                else:
+                    status_obj = status_area.status(
+                        f"{emoji_name} - {status_text}", state="running", expanded=False
+                    )
+                    # Create placeholder inside status for subgraph steps
+                    with status_obj:
+                        step_placeholder = st.empty()
+
+            # Display subgraph step inside the status
+            if subgraph_step and step_placeholder:
+                with step_placeholder:
+                    st.write(subgraph_step)
+
+            # Track final response
+            if response:
+                final_response = response
+
+    with answer_area:
+        streamed = st.write_stream(answer_tokens())
+
+    # 첫 토큰까지 걸린 시간(TTFT)과 전체 응답 시간
+    elapsed = time.perf_counter() - started
+    if first_token_at is not None:
+        ttft = first_token_at - started
+        print(f"[stream] first token {ttft:.2f}s, total {elapsed:.2f}s")
+        timing = f"첫 토큰 {ttft:.1f}초 / 전체 {elapsed:.1f}초"
+    else:
+        print(f"[stream] no streamed tokens, total {elapsed:.2f}s")
+        timing = f"전체 {elapsed:.1f}초"
+
+    # 공유 커넥션 풀의 연결 재사용 (카운터는 프로세스 전체 기준)
+    http_after = get_http_stats()
+    print(
+        f"[http] this turn: {http_after['requests'] - http_before['requests']} requests, "
+        f"{http_after['connections'] - http_before['connections']} new connections "
+        f"(process reuse {http_after['reuse_ratio']:.0%})"
+    )
 
     # Mark final status as complete
     if status_obj:
-        status_obj.update(state="complete", expanded=False)
+        status_obj.update(
+            label=f"{current_status['emoji_name']} - 완료 ({timing})",
+            state="complete",
+            expanded=False,
+        )
+
+    if not final_response:
+        final_response = "응답을 생성하지 못했습니다."
 
-    # Return the final response
-    if final_response:
-        return final_response
+    # 도구 호출 전 중간 답변 등이 섞였거나 스트리밍되지 않았으면 최종 답변으로 교체
+    if not isinstance(streamed, str) or streamed.strip() != final_response.strip():
+        answer_area.markdown(final_response)
 
-    return "응답을 생성하지 못했습니다."
+    return final_response
 
 
 def render_ui():
@@ -191,10 +291,8 @@ def render_ui():
 
         # Display assistant response in chat message container
         with st.chat_message("assistant"):
-            # Invoke workflow with agent status display
+            # Invoke workflow with agent status display (answer is streamed)
             full_response = invoke_workflow()
-            # Display final response
-            st.markdown(full_response)
 
         # Add assistant response to chat history
         st.session_state.messages.append(
@@ -223,4 +321,8 @@ if __name__ == "__main__":
 
     db_session.initialize()
 
+    # 논문/웹 검색용 MCP 세션을 미리 열어 첫 검색의 대기 시간을 줄임
+    arxiv_mcp_pool.warm_up()
+    exa_mcp_pool.warm_up()
+
     render_ui()
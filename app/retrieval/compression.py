@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+# PQ 코드북(8bit, 256 centroid) 학습에 필요한 최소 벡터 수
+PQ_MIN_TRAINING_POINTS = 39 * 256
+# SQ8은 차원별 min/max를 학습하므로 너무 적은 표본으로 범위를 고정하지 않도록 함
+SQ8_MIN_TRAINING_POINTS = 1_000
+
+
+class Compression:
+    NONE = "none"
+    FP16 = "fp16"
+    INT8 = "int8"
+    PQ = "pq"
+
+
+def min_training_points(compression: str) -> int:
+    if compression == Compression.PQ:
+        return PQ_MIN_TRAINING_POINTS
+    if compression == Compression.INT8:
+        return SQ8_MIN_TRAINING_POINTS
+    return 0
+
+
+def storage_factory(compression: str, pq_m: int) -> str:
+    """Factory-string fragment for how vectors are stored (``Flat``, ``SQ8``...)."""
+    if compression == Compression.NONE:
+        return "Flat"
+    if compression == Compression.FP16:
+        return "SQfp16"
+    if compression == Compression.INT8:
+        return "SQ8"
+    if compression == Compression.PQ:
+        return f"PQ{pq_m}"
+    raise ValueError(f"Invalid VECTOR_COMPRESSION: {compression}")
+
+
+def _codec_of(index: faiss.Index) -> str:
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return Compression.FP16
+        return Compression.INT8
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return Compression.PQ
+    return Compression.NONE
+
+
+def compression_of(index: faiss.Index) -> str:
+    """Return how the vectors of a (possibly HNSW/IVF) index are encoded."""
+    if isinstance(index, faiss.IndexHNSW):
+        return _codec_of(faiss.downcast_index(index.storage))
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return _codec_of(index)
+    # extract_index_ivf는 기반 클래스(IndexIVF)로 반환하므로 실제 타입으로 변환
+    return _codec_of(faiss.downcast_index(ivf))
+
+
+class VectorSidecar:
+    """Full-precision copy of the index vectors, kept in index position order.
+
+    The committed copy is a raw float32 file that is memory-mapped read-only,
+    so only the rows touched by re-ranking are paged in. A writer's copy
+    records which committed rows survive deletes and keeps newly added rows
+    in memory until ``save``.
+    """
+
+    def __init__(self, base: np.ndarray):
+        self.dim = base.shape[1]
+        self._base = base
+        self._order = np.arange(len(base), dtype="int64")
+        self._added: List[np.ndarray] = []
+
+    @classmethod
+    def open(cls, path: str, dim: int) -> Optional["VectorSidecar"]:
+        if not os.path.exists(path):
+            return None
+        size = os.path.getsize(path) // 4
+        if size % dim:
+            return None
+        if size == 0:
+            return cls(np.zeros((0, dim), dtype="float32"))
+        return cls(np.memmap(path, dtype="float32", mode="r", shape=(size // dim, dim)))
+
+    @classmethod
+    def from_array(cls, vectors: np.ndarray) -> "VectorSidecar":
+        return cls(np.ascontiguousarray(vectors, dtype="float32"))
+
+    def __len__(self) -> int:
+        return len(self._order) + sum(len(rows) for rows in self._added)
+
+    def copy(self) -> "VectorSidecar":
+        copied = VectorSidecar.__new__(VectorSidecar)
+        copied.dim = self.dim
+        copied._base = self._base
+        copied._order = self._order.copy()
+        copied._added = list(self._added)
+        return copied
+
+    def _added_rows(self) -> np.ndarray:
+        if len(self._added) > 1:
+            self._added = [np.vstack(self._added)]
+        return self._added[0] if self._added else np.zeros((0, self.dim), "float32")
+
+    def append(self, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype="float32").reshape(-1, self.dim)
+        if len(vectors):
+            self._added.append(vectors)
+
+    def take(self, positions: Sequence[int]) -> np.ndarray:
+        """Return the full-precision rows at the given index positions."""
+        positions = np.asarray(positions, dtype="int64")
+        n_base = len(self._order)
+        rows = np.empty((len(positions), self.dim), dtype="float32")
+        in_base = positions < n_base
+        if in_base.any():
+            rows[in_base] = self._base[self._order[positions[in_base]]]
+        if not in_base.all():
+            rows[~in_base] = self._added_rows()[positions[~in_base] - n_base]
+        return rows
+
+    def keep(self, positions: Sequence[int]):
+        """Drop every row not in ``positions`` (sorted), like ``remove_ids``."""
+        positions = np.asarray(positions, dtype="int64")
+        n_base = len(self._order)
+        added = self._added_rows()[positions[positions >= n_base] - n_base]
+        self._order = self._order[positions[positions < n_base]]
+        self._added = [added] if len(added) else []
+
+    def to_array(self) -> np.ndarray:
+        return self.take(np.arange(len(self), dtype="int64"))
+
+    def save(self, path: str, batch_size: int = 4096):
+        with open(path, "wb") as f:
+            # 커밋된 파일에서 남은 행만 순서대로 복사 (전체를 메모리에 올리지 않음)
+            for start in range(0, len(self._order), batch_size):
+                rows = self._base[self._order[start : start + batch_size]]
+                f.write(np.ascontiguousarray(rows, dtype="float32").tobytes())
+            for rows in self._added:
+                f.write(np.ascontiguousarray(rows, dtype="float32").tobytes())
+
+
+def rerank(
+    query: np.ndarray,
+    positions: Sequence[int],
+    vectors: VectorSidecar,
+    k: int,
+    metric: int = faiss.METRIC_L2,
+) -> List[int]:
+    """Re-score candidate positions with full-precision vectors."""
+    if not len(positions):
+        return []
+    candidates = np.asarray(positions, dtype="int64")
+    exact = vectors.take(candidates)
+    query = np.asarray(query, dtype="float32").reshape(-1)
+    if metric == faiss.METRIC_INNER_PRODUCT:
+        scores = -(exact @ query)
+    else:
+        scores = ((exact - query) ** 2).sum(axis=1)
+    order = np.argsort(scores, kind="stable")[:k]
+    return candidates[order].tolist()
+
+
+if __name__ == "__main__":
+    # 압축 방식별 메모리 / recall@k 벤치마크: python app/retrieval/compression.py [N] [DIM]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    k, n_queries, factor = 10, 200, 4
+
+    # 군집 구조가 있는 합성 코퍼스 (실제 임베딩처럼 단위 벡터)
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((64, dim)).astype("float32")
+    corpus = centers[rng.integers(0, 64, n)] + 0.6 * rng.standard_normal(
+        (n, dim)
+    ).astype("float32")
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = corpus[
+        rng.choice(n, n_queries, replace=False)
+    ] + 0.1 * rng.standard_normal((n_queries, dim)).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, k)
+    sidecar = VectorSidecar.from_array(corpus)
+
+    def recall(labels: np.ndarray) -> float:
+        return np.mean([len(set(row) & set(t)) / k for row, t in zip(labels, truth)])
+
+    pq_m = next(m for m in (64, 32, 16, 8, 4, 2, 1) if dim % m == 0 and m <= dim // 4)
+    print(f"N={n}, dim={dim}, recall@{k}, re-rank over top {k * factor}")
+    print(
+        f"{'compression':<12}{'memory':>12}{'saved':>8}{'recall':>9}{'reranked':>10}{'ms/q':>8}"
+    )
+    baseline = None
+    for compression in (
+        Compression.NONE,
+        Compression.FP16,
+        Compression.INT8,
+        Compression.PQ,
+    ):
+        index = faiss.index_factory(dim, storage_factory(compression, pq_m))
+        if not index.is_trained:
+            index.train(corpus[: max(PQ_MIN_TRAINING_POINTS, n // 2)])
+        index.add(corpus)
+        memory = len(faiss.serialize_index(index))
+        baseline = baseline or memory
+
+        _, labels = index.search(queries, k)
+        started = time.perf_counter()
+        _, candidates = index.search(queries, k * factor)
+        reranked = [
+            rerank(q, [p for p in row if p != -1], sidecar, k)
+            for q, row in zip(queries, candidates)
+        ]
+        elapsed = (time.perf_counter() - started) * 1000 / n_queries
+        print(
+            f"{compression:<12}{memory / 2**20:>10.1f}MB{1 - memory / baseline:>8.0%}"
+            f"{recall(labels):>9.3f}{recall(np.array(reranked)):>10.3f}{elapsed:>8.2f}"
+        )
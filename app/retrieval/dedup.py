@@ -0,0 +1,184 @@
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from retrieval.docstore import SQLiteDocstore
+from retrieval.document_index import DocumentIndex
+
+NUM_PERM = 64
+# LSH 밴드 수 x 행 수 = NUM_PERM (16 x 4: Jaccard 0.8 이상은 거의 항상 후보가 됨)
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_WORD_RE = re.compile(r"\w+")
+_rng = np.random.default_rng(1)
+# 32bit 범위의 범용 해시 (a*x + b) mod 2^32, a는 홀수
+_A = _rng.integers(1, 2**32, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**32, NUM_PERM, dtype=np.uint64)
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Word n-grams of the lower-cased text (whitespace and punctuation ignored)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (``NUM_PERM`` uint32 values) of a chunk's shingles."""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in set(shingles(text))), dtype=np.uint64
+    )
+    if not len(hashes):
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    permuted = (np.outer(hashes, _A) + _B) & _MASK
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """LSH bucket keys (signed 64-bit, one per band) for SQLite lookup."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+class Deduplicator:
+    """Skips chunks that are near-duplicates of indexed or just-added chunks.
+
+    Signatures of committed chunks live in the docstore and are looked up by
+    LSH band; chunks kept during the current ingest are tracked in memory as
+    soon as ``filter`` keeps them, so copies within one batch or across
+    batches are caught as well. Skipped chunks are recorded on the document's
+    manifest entry as links to the chunk of the document that holds the
+    original. Only chunks of other documents count as originals; repeated
+    text within one document is kept so every page keeps its own chunks.
+    """
+
+    def __init__(self, documents: DocumentIndex, threshold: float = 0.85):
+        self.documents = documents
+        self.threshold = threshold
+        self.skipped = 0
+        self._bands: Dict[int, List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._owners: Optional[Dict[str, str]] = None
+        # filter가 남긴 청크의 임시 키 (register에서 docstore ID로 교체)
+        self._pending: List[str] = []
+        # 임시 키를 가리키는 링크: (중복 문서 source, 원본 문서, 임시 키)
+        self._pending_links: List[Tuple[str, str, str]] = []
+        self._counter = 0
+
+    def _owner_map(self) -> Dict[str, str]:
+        if self._owners is None:
+            self._owners = {
+                doc_id: name
+                for name, entry in self.documents.entries.items()
+                for doc_id in entry["ids"]
+            }
+        return self._owners
+
+    def _remember(
+        self, doc_id: str, signature: np.ndarray, keys: List[int], owner: str
+    ):
+        self._signatures[doc_id] = signature
+        for key in keys:
+            self._bands.setdefault(key, []).append(doc_id)
+        self._owner_map()[doc_id] = owner
+
+    def _rekey(self, old: str, new: str, keys: List[int]):
+        self._signatures[new] = self._signatures.pop(old)
+        for key in keys:
+            bucket = self._bands[key]
+            bucket[bucket.index(old)] = new
+        owners = self._owner_map()
+        owners[new] = owners.pop(old)
+
+    def _find(
+        self,
+        signature: np.ndarray,
+        keys: List[int],
+        docstore: Optional[SQLiteDocstore],
+        own: str,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Best matching chunk of another document and that document's key."""
+        candidates = {
+            doc_id: self._signatures[doc_id]
+            for key in keys
+            for doc_id in self._bands.get(key, ())
+        }
+        if docstore is not None:
+            for doc_id, blob in docstore.minhash_candidates(keys).items():
+                candidates.setdefault(doc_id, np.frombuffer(blob, dtype=np.uint32))
+        owners = self._owner_map()
+        best, best_owner, best_score = None, None, self.threshold
+        for doc_id, other in candidates.items():
+            owner = owners.get(doc_id)
+            # 같은 문서나 더 이상 색인에 없는 청크는 원본으로 쓰지 않음
+            if owner is None or owner == own:
+                continue
+            score = similarity(signature, other)
+            if score >= best_score:
+                best, best_owner, best_score = doc_id, owner, score
+        return best, best_owner
+
+    def filter(
+        self, splits: List[Document], docstore: Optional[SQLiteDocstore]
+    ) -> Tuple[List[Document], List[np.ndarray]]:
+        """Return the chunks worth embedding and their signatures.
+
+        The kept chunks must be passed to ``register`` with their docstore
+        IDs, in the same order, before the next call.
+        """
+        kept, signatures = [], []
+        for doc in splits:
+            signature = minhash(doc.page_content)
+            keys = band_keys(signature)
+            source = doc.metadata.get("source", "")
+            own = DocumentIndex.key(source)
+            original, owner = self._find(signature, keys, docstore, own)
+            if original is None:
+                # 같은 배치의 뒤쪽 청크와도 비교되도록 임시 키로 바로 등록
+                pending = f"pending:{self._counter}"
+                self._counter += 1
+                self._remember(pending, signature, keys, own)
+                self._pending.append(pending)
+                kept.append(doc)
+                signatures.append(signature)
+                continue
+
+            self.skipped += 1
+            if original.startswith("pending:"):
+                self._pending_links.append((source, owner, original))
+            else:
+                self.documents.link(source, owner, original)
+        return kept, signatures
+
+    def register(
+        self,
+        ids: List[str],
+        signatures: List[np.ndarray],
+        docstore: SQLiteDocstore,
+    ):
+        """Re-key the kept chunks to their IDs and stage signatures for commit."""
+        final = {}
+        for pending, doc_id, signature in zip(self._pending, ids, signatures):
+            keys = band_keys(signature)
+            self._rekey(pending, doc_id, keys)
+            final[pending] = doc_id
+            docstore.set_minhash(doc_id, signature.tobytes(), keys)
+        for source, owner, pending in self._pending_links:
+            self.documents.link(source, owner, final[pending])
+        self._pending, self._pending_links = [], []
@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source);
+
+-- 중복 청크 탐지용 MinHash 서명과 LSH 밴드 버킷
+CREATE TABLE IF NOT EXISTS chunk_minhash (
+    id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunk_minhash_bands (
+    band_key INTEGER NOT NULL,
+    id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_minhash_bands_key ON chunk_minhash_bands (band_key);
+CREATE INDEX IF NOT EXISTS idx_minhash_bands_id ON chunk_minhash_bands (id);
+"""
+
+# 청크 본문에 대한 BM25 역색인 (chunks 테이블과 같은 트랜잭션에서 갱신)
+LEXICAL_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5 (
+    id UNINDEXED,
+    page_content
+);
+"""
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """청크 텍스트/메타데이터를 SQLite에 두고 필요한 것만 읽는 docstore
+
+    pickle docstore와 달리 전체를 메모리에 올리지 않고 검색된 top-k 청크만
+    조회하므로, 여러 Streamlit 프로세스가 같은 파일을 공유해도 상주 메모리가
+    코퍼스 크기에 비례해 늘지 않습니다.
+
+    쓰기(add/update/delete)는 ``flush``가 호출될 때까지 이 객체 안에만 쌓여서,
+    같은 파일을 읽는 다른 스냅샷에는 커밋 전까지 보이지 않습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._pending: Dict[str, Document] = {}
+        self._deleted: set = set()
+        self._minhash: Dict[str, Tuple[bytes, List[int]]] = {}
+        self.has_lexical_index = True
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드 간 공유하지 않음
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.executescript(SCHEMA)
+            self._init_lexical_index(conn)
+            self._local.conn = conn
+        return conn
+
+    def _init_lexical_index(self, conn: sqlite3.Connection):
+        try:
+            conn.executescript(LEXICAL_SCHEMA)
+        except sqlite3.OperationalError as e:
+            # FTS5 없이 빌드된 SQLite면 벡터 검색만 사용
+            print(f"Lexical index unavailable: {e}")
+            self.has_lexical_index = False
+            return
+
+        # 역색인 도입 이전에 만들어진 docstore는 한 번 채워 넣음
+        empty = conn.execute("SELECT 1 FROM chunks_fts LIMIT 1").fetchone() is None
+        if empty and conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone():
+            with conn:
+                conn.execute(
+                    "INSERT INTO chunks_fts (rowid, id, page_content) "
+                    "SELECT rowid, id, page_content FROM chunks"
+                )
+
+    def fork(self) -> "SQLiteDocstore":
+        """Return a writable view over the same file with its own pending changes."""
+        forked = SQLiteDocstore(self.path)
+        forked._pending = dict(self._pending)
+        forked._deleted = set(self._deleted)
+        forked._minhash = dict(self._minhash)
+        return forked
+
+    @staticmethod
+    def _to_document(row) -> Document:
+        doc_id, page_content, metadata = row
+        return Document(
+            id=doc_id, page_content=page_content, metadata=json.loads(metadata)
+        )
+
+    def mget(self, ids: List[str]) -> List[Optional[Document]]:
+        """Fetch documents by ID, preserving order (None for unknown IDs)."""
+        found: Dict[str, Document] = {}
+        lookup = []
+        for doc_id in ids:
+            if doc_id in self._deleted:
+                continue
+            if doc_id in self._pending:
+                found[doc_id] = self._pending[doc_id]
+            else:
+                lookup.append(doc_id)
+
+        conn = self._connect()
+        # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+        for start in range(0, len(lookup), 500):
+            batch = lookup[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT id, page_content, metadata FROM chunks WHERE id IN ({placeholders})",
+                batch,
+            )
+            for row in rows:
+                found[row[0]] = self._to_document(row)
+
+        return [found.get(doc_id) for doc_id in ids]
+
+    def search(self, search: str) -> Union[str, Document]:
+        doc = self.mget([search])[0]
+        return doc if doc is not None else f"ID {search} not found."
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        ids = list(texts)
+        overlapping = [
+            doc_id
+            for doc_id, stored in zip(ids, self._stored_flags(ids))
+            if doc_id in self._pending or (stored and doc_id not in self._deleted)
+        ]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self.update(texts)
+
+    def update(self, texts: Dict[str, Document]) -> None:
+        """Insert or replace documents (e.g. metadata-only rename)."""
+        for doc_id, doc in texts.items():
+            self._deleted.discard(doc_id)
+            self._pending[doc_id] = doc
+
+    def delete(self, ids: List) -> None:
+        for doc_id in ids:
+            self._pending.pop(doc_id, None)
+            self._minhash.pop(doc_id, None)
+            self._deleted.add(doc_id)
+
+    def set_minhash(self, doc_id: str, signature: bytes, band_keys: List[int]):
+        """Stage a chunk's MinHash signature and LSH band keys for ``flush``."""
+        self._minhash[doc_id] = (signature, band_keys)
+
+    def minhash_candidates(self, band_keys: List[int]) -> Dict[str, bytes]:
+        """Committed chunks sharing at least one LSH band, with their signatures."""
+        conn = self._connect()
+        placeholders = ",".join("?" * len(band_keys))
+        rows = conn.execute(
+            "SELECT DISTINCT m.id, m.signature FROM chunk_minhash_bands b "
+            "JOIN chunk_minhash m ON m.id = b.id "
+            f"WHERE b.band_key IN ({placeholders})",
+            band_keys,
+        )
+        return {
+            doc_id: signature
+            for doc_id, signature in rows
+            if doc_id not in self._deleted
+        }
+
+    def search_lexical(
+        self,
+        query: str,
+        k: int,
+        sources: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (id, bm25 score) pairs for an FTS5 MATCH query.
+
+        Scores follow SQLite's ``bm25()`` convention: lower is more relevant.
+        ``sources`` restricts matches to chunks of the given source paths,
+        plus the chunks listed in ``ids``. Only committed chunks are searched.
+        """
+        conn = self._connect()
+        if not (query and self.has_lexical_index):
+            return []
+        sql = (
+            "SELECT chunks_fts.id, bm25(chunks_fts) AS score FROM chunks_fts "
+            "WHERE chunks_fts MATCH ?"
+        )
+        params: list = [query]
+        if sources is not None:
+            placeholders = ",".join("?" * len(sources))
+            scope = f"source IN ({placeholders})"
+            params.extend(sources)
+            if ids:
+                # ID 목록은 길 수 있으므로 변수 개수 제한이 없는 JSON 배열 하나로 전달
+                scope += " OR id IN (SELECT value FROM json_each(?))"
+                params.append(json.dumps(ids))
+            sql += f" AND chunks_fts.rowid IN (SELECT rowid FROM chunks WHERE {scope})"
+        try:
+            rows = conn.execute(
+                sql + " ORDER BY score LIMIT ?", params + [k]
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"Lexical search error: {e}")
+            return []
+        return [
+            (doc_id, score) for doc_id, score in rows if doc_id not in self._deleted
+        ]
+
+    def count(self) -> int:
+        conn = self._connect()
+        stored = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        changed = list(self._pending) + list(self._deleted)
+        if not changed:
+            return stored
+
+        # 대기 중인 변경을 반영한 개수
+        flags = dict(zip(changed, self._stored_flags(changed)))
+        added = sum(1 for doc_id in self._pending if not flags[doc_id])
+        removed = sum(1 for doc_id in self._deleted if flags[doc_id])
+        return stored + added - removed
+
+    def _stored_flags(self, ids: List[str]) -> List[bool]:
+        conn = self._connect()
+        stored = set()
+        for start in range(0, len(ids), 500):
+            batch = ids[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            stored.update(
+                row[0]
+                for row in conn.execute(
+                    f"SELECT id FROM chunks WHERE id IN ({placeholders})", batch
+                )
+            )
+        return [doc_id in stored for doc_id in ids]
+
+    def flush(self):
+        """Write pending changes in a single transaction."""
+        if not (self._pending or self._deleted or self._minhash):
+            return
+        conn = self._connect()
+        with conn:
+            if self.has_lexical_index:
+                # 역색인 행은 chunks와 같은 rowid를 쓰므로 전체 스캔 없이 지울 수 있음
+                conn.executemany(
+                    "DELETE FROM chunks_fts WHERE rowid = "
+                    "(SELECT rowid FROM chunks WHERE id = ?)",
+                    [(doc_id,) for doc_id in list(self._pending) + list(self._deleted)],
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, source, page_content, metadata) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        doc_id,
+                        doc.metadata.get("source", ""),
+                        doc.page_content,
+                        json.dumps(doc.metadata, ensure_ascii=False),
+                    )
+                    for doc_id, doc in self._pending.items()
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM chunks WHERE id = ?",
+                [(doc_id,) for doc_id in self._deleted],
+            )
+            stale = [(doc_id,) for doc_id in list(self._deleted) + list(self._minhash)]
+            conn.executemany("DELETE FROM chunk_minhash WHERE id = ?", stale)
+            conn.executemany("DELETE FROM chunk_minhash_bands WHERE id = ?", stale)
+            conn.executemany(
+                "INSERT INTO chunk_minhash (id, signature) VALUES (?, ?)",
+                [(doc_id, sig) for doc_id, (sig, _) in self._minhash.items()],
+            )
+            conn.executemany(
+                "INSERT INTO chunk_minhash_bands (band_key, id) VALUES (?, ?)",
+                [
+                    (key, doc_id)
+                    for doc_id, (_, keys) in self._minhash.items()
+                    for key in keys
+                ],
+            )
+            if self.has_lexical_index:
+                conn.executemany(
+                    "INSERT INTO chunks_fts (rowid, id, page_content) "
+                    "SELECT rowid, id, page_content FROM chunks WHERE id = ?",
+                    [(doc_id,) for doc_id in self._pending],
+                )
+        self._pending.clear()
+        self._deleted.clear()
+        self._minhash.clear()
+
+    def iter_documents(self, batch_size: int = 500) -> Iterable[Document]:
+        """Stream every stored document (including pending changes)."""
+        conn = self._connect()
+        cursor = conn.execute("SELECT id, page_content, metadata FROM chunks")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                if row[0] in self._deleted or row[0] in self._pending:
+                    continue
+                yield self._to_document(row)
+        yield from self._pending.values()
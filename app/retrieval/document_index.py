@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str, with_hash: bool = True) -> Dict[str, Any]:
+    stat = os.stat(path)
+    fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if with_hash:
+        fingerprint["sha256"] = file_sha256(path)
+    return fingerprint
+
+
+class DocumentIndex:
+    """PDF 파일명 → 청크 ID 사이드 인덱스 (색인 매니페스트)
+
+    각 항목은 원본 경로(source), docstore ID 목록, 청크 수, 페이지 범위와
+    색인 당시 파일 정보(size, mtime, sha256)를 가지고 있어서 삭제/이름 변경/
+    청크 조회 시 docstore 전체를 훑지 않아도 되고, 재색인 시 변경분만 계산할
+    수 있습니다. 중복으로 건너뛴 청크는 원본 문서별 개수(duplicates)와 대신
+    사용할 원본 청크 ID(linked)로 남깁니다.
+    색인 도중 체크포인트로 저장된 문서는 이어서 읽을 페이지(resume_page)를 가집니다.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+
+    @staticmethod
+    def key(source: str) -> str:
+        return os.path.basename(source)
+
+    @classmethod
+    def from_documents(cls, items: Iterable[Tuple[str, Document]]) -> "DocumentIndex":
+        index = cls()
+        for doc_id, doc in items:
+            index.add(doc_id, doc)
+        return index
+
+    @classmethod
+    def load(cls, path: str) -> Optional["DocumentIndex"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Error loading document index: {e}")
+            return None
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+
+    def copy(self) -> "DocumentIndex":
+        copied = DocumentIndex(
+            {
+                name: {
+                    **entry,
+                    "ids": list(entry["ids"]),
+                    "pages": list(entry["pages"]),
+                }
+                for name, entry in self.entries.items()
+            }
+        )
+        for entry in copied.entries.values():
+            if "duplicates" in entry:
+                entry["duplicates"] = dict(entry["duplicates"])
+            if "linked" in entry:
+                entry["linked"] = list(entry["linked"])
+        return copied
+
+    def __contains__(self, filename: str) -> bool:
+        return self.key(filename) in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def chunk_count(self) -> int:
+        return sum(entry["chunks"] for entry in self.entries.values())
+
+    def filenames(self) -> List[str]:
+        return list(self.entries.keys())
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.key(filename))
+
+    def ids(self, filename: str) -> List[str]:
+        entry = self.get(filename)
+        return list(entry["ids"]) if entry else []
+
+    def _entry(self, source: str) -> Dict[str, Any]:
+        return self.entries.setdefault(
+            self.key(source), {"source": source, "ids": [], "chunks": 0, "pages": []}
+        )
+
+    def add(self, doc_id: str, doc: Document):
+        entry = self._entry(doc.metadata.get("source", ""))
+        entry["ids"].append(doc_id)
+        entry["chunks"] += 1
+
+        page = doc.metadata.get("page")
+        if isinstance(page, int):
+            pages = entry["pages"]
+            entry["pages"] = (
+                [min(pages[0], page), max(pages[1], page)] if pages else [page, page]
+            )
+
+    def truncate(self, path: str, doc_ids: List[str], page: int):
+        """Forget the chunks ``doc_ids`` of pages from ``page`` on."""
+        entry = self.get(path)
+        if entry is None:
+            return
+        dropped = set(doc_ids)
+        entry["ids"] = [doc_id for doc_id in entry["ids"] if doc_id not in dropped]
+        entry["chunks"] = len(entry["ids"])
+        pages = entry["pages"]
+        entry["pages"] = [pages[0], page - 1] if pages and page > pages[0] else []
+
+    def link(self, source: str, original: str, doc_id: str):
+        """Record that a chunk of ``source`` was skipped as a duplicate of
+        chunk ``doc_id`` of the document ``original``."""
+        entry = self._entry(source)
+        duplicates = entry.setdefault("duplicates", {})
+        duplicates[original] = duplicates.get(original, 0) + 1
+        linked = entry.setdefault("linked", [])
+        if doc_id not in linked:
+            linked.append(doc_id)
+
+    def linked_ids(self, filename: str) -> List[str]:
+        """IDs of other documents' chunks standing in for skipped duplicates."""
+        entry = self.get(filename)
+        if not entry or not entry.get("duplicates"):
+            return []
+        if "linked" in entry:
+            return list(entry["linked"])
+        # 청크 ID를 기록하기 전에 색인된 문서는 원본 문서의 청크 전체로 대신
+        return [
+            doc_id for original in entry["duplicates"] for doc_id in self.ids(original)
+        ]
+
+    def mark_duplicate_documents(self, paths: List[str], ratio: float) -> List[str]:
+        """Flag documents whose chunks are mostly copies of one other document."""
+        messages = []
+        for path in paths:
+            entry = self.get(path)
+            duplicates = entry.get("duplicates") if entry else None
+            if not duplicates:
+                continue
+            original, count = max(duplicates.items(), key=lambda item: item[1])
+            if count / (sum(duplicates.values()) + entry["chunks"]) >= ratio:
+                entry["duplicate_of"] = original
+                messages.append(f"{self.key(path)} is a near-duplicate of {original}")
+        return messages
+
+    def dependents(self, filenames: List[str]) -> List[str]:
+        """Documents that (transitively) link to chunks stored under ``filenames``."""
+        removed = {self.key(name) for name in filenames}
+        found: List[str] = []
+        changed = True
+        while changed:
+            changed = False
+            for name, entry in self.entries.items():
+                if name in removed:
+                    continue
+                if removed & entry.get("duplicates", {}).keys():
+                    removed.add(name)
+                    found.append(name)
+                    changed = True
+        return found
+
+    def set_file(self, path: str, fingerprint: Dict[str, Any]):
+        entry = self.get(path)
+        if entry is not None:
+            entry["file"] = fingerprint
+
+    def resume_page(self, path: str) -> Optional[int]:
+        """First page not yet indexed, or None if the document is complete."""
+        entry = self.get(path)
+        return entry.get("resume_page") if entry else None
+
+    def set_resume_page(self, path: str, page: Optional[int]):
+        entry = self.get(path)
+        if entry is None:
+            return
+        if page is None:
+            entry.pop("resume_page", None)
+        else:
+            entry["resume_page"] = page
+
+    def is_unchanged(self, path: str) -> bool:
+        """Whether ``path`` matches the file that was indexed under its name."""
+        entry = self.get(path)
+        indexed = entry.get("file") if entry else None
+        if not indexed:
+            return False
+
+        current = file_fingerprint(path, with_hash=False)
+        if current["size"] != indexed["size"]:
+            return False
+        if current["mtime"] == indexed["mtime"]:
+            return True
+
+        # mtime만 바뀐 경우(복사/touch) 내용 해시로 확인
+        current["sha256"] = file_sha256(path)
+        if current["sha256"] != indexed.get("sha256"):
+            return False
+        entry["file"] = current
+        return True
+
+    def remove(self, filename: str) -> Optional[Dict[str, Any]]:
+        return self.entries.pop(self.key(filename), None)
+
+    def rename(self, old_filename: str, new_source: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.pop(self.key(old_filename), None)
+        if entry is None:
+            return None
+        entry["source"] = new_source
+        old_key, new_key = self.key(old_filename), self.key(new_source)
+        self.entries[new_key] = entry
+
+        # 이 문서를 원본으로 가리키는 중복 링크도 새 이름으로 변경
+        for other in self.entries.values():
+            duplicates = other.get("duplicates", {})
+            if old_key in duplicates:
+                duplicates[new_key] = duplicates.pop(old_key)
+            if other.get("duplicate_of") == old_key:
+                other["duplicate_of"] = new_key
+        return entry
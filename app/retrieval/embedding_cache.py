@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+from retrieval.query_cache import LRUCache, normalize_query
+
+EMBEDDING_CACHE_PATH = "app/storage/embedding_cache.db"
+
+
+def text_key(model_name: str, text: str) -> str:
+    """Content address of a chunk: hash of (embedding model, chunk text)."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite 기반 영구 임베딩 캐시 (키: 모델 + 청크 텍스트 해시)"""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        if not keys:
+            return found
+        with self._lock:
+            conn = self._connect()
+            # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(k, array("f", v).tobytes()) for k, v in items.items()],
+                )
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the backend for unseen chunks.
+
+    Query embeddings go through an in-process LRU first and, when
+    ``persist_queries`` is set, the same SQLite cache as chunk embeddings,
+    so a repeated question costs no API round-trip even after a restart.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache: EmbeddingCache = None,
+        query_cache_size: int = 1024,
+        persist_queries: bool = True,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.query_cache = LRUCache(query_cache_size)
+        self.persist_queries = persist_queries
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(self.model_name, text) for text in texts]
+        try:
+            found = self.cache.get_many(list(set(keys)))
+        except sqlite3.Error as e:
+            print(f"Embedding cache read error: {e}")
+            found = {}
+
+        # 같은 배치 안의 중복 텍스트는 한 번만 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        self.hits += len(keys) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            try:
+                self.cache.put_many(computed)
+            except sqlite3.Error as e:
+                print(f"Embedding cache write error: {e}")
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        text = normalize_query(text)
+        # 청크 임베딩과 키 공간이 겹치지 않도록 접두어 사용
+        key = text_key(self.model_name, f"query\0{text}")
+        vector = self.query_cache.get(key)
+        if vector is not None:
+            return vector
+
+        if self.persist_queries:
+            try:
+                vector = self.cache.get_many([key]).get(key)
+            except sqlite3.Error as e:
+                print(f"Embedding cache read error: {e}")
+
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            if self.persist_queries:
+                try:
+                    self.cache.put_many({key: vector})
+                except sqlite3.Error as e:
+                    print(f"Embedding cache write error: {e}")
+        self.query_cache.put(key, vector)
+        return vector
+
+    def stats(self) -> Dict[str, int]:
+        query = self.query_cache.stats()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "query_hits": query["hits"],
+            "query_misses": query["misses"],
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.query_cache.hits = 0
+        self.query_cache.misses = 0
@@ -0,0 +1,61 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 스레드 잠금만 사용
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """Advisory inter-process lock on ``path`` (exclusive unless ``shared``)."""
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class WriterLock:
+    """Reentrant single-writer lock shared by threads and processes.
+
+    The first (outermost) acquisition in a thread also takes an exclusive
+    file lock, so writers in other Streamlit processes are serialized too.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file_lock = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            file_ctx = file_lock(self.path)
+            try:
+                file_ctx.__enter__()
+            except BaseException:
+                self._lock.release()
+                raise
+            self._file_lock = file_ctx
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                file_ctx, self._file_lock = self._file_lock, None
+                file_ctx.__exit__(exc_type, exc, tb)
+        finally:
+            self._lock.release()
+        return False
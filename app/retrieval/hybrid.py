@@ -0,0 +1,71 @@
+import re
+from typing import Dict, Iterable, List, Sequence
+
+# RRF 상수 (Cormack et al. 2009 권장값)
+RRF_K = 60
+
+# 소수점/하이픈/밑줄이 들어간 용어(0.001, gpt-4, d_model)를 한 토큰으로 취급
+_TOKEN_RE = re.compile(r"\w[\w.\-]*\w|\w")
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+
+
+class RetrievalMode:
+    AUTO = "auto"
+    HYBRID = "hybrid"
+    VECTOR = "vector"
+    LEXICAL = "lexical"
+
+
+def tokenize(query: str) -> List[str]:
+    return _TOKEN_RE.findall(query)
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression (OR of quoted terms).
+
+    Quoted phrases in the query are kept as phrases; every other token is
+    quoted so punctuation and FTS5 keywords (AND/OR/NEAR) are matched
+    literally instead of being parsed as query syntax.
+    """
+    terms = []
+    for phrase in _QUOTED_RE.findall(query):
+        words = tokenize(phrase)
+        if words:
+            terms.append('"' + " ".join(words) + '"')
+    for token in tokenize(_QUOTED_RE.sub(" ", query)):
+        term = f'"{token}"'
+        if term not in terms:
+            terms.append(term)
+    return " OR ".join(terms)
+
+
+def _is_exact_term(token: str) -> bool:
+    # 숫자/하이퍼파라미터 값, 약어(BERT, LoRA), 기호가 섞인 식별자
+    return (
+        any(c.isdigit() for c in token)
+        or any(c in ".-_" for c in token)
+        or sum(c.isupper() for c in token) >= 2
+    )
+
+
+def is_lexical_query(query: str, max_terms: int = 3) -> bool:
+    """Heuristic for queries that BM25 alone answers well.
+
+    Quoted phrases and short queries made only of exact terms (acronyms,
+    numbers, symbols) skip the query embedding entirely.
+    """
+    if _QUOTED_RE.search(query):
+        return True
+    tokens = tokenize(query)
+    return 0 < len(tokens) <= max_terms and all(_is_exact_term(t) for t in tokens)
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]], k: int = RRF_K
+) -> List[str]:
+    """Merge several ranked ID lists by summing 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
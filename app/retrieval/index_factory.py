@@ -0,0 +1,240 @@
+import math
+from typing import List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from retrieval.compression import (
+    PQ_MIN_TRAINING_POINTS,
+    Compression,
+    VectorSidecar,
+    compression_of,
+    min_training_points,
+    storage_factory,
+)
+from utils.config import settings
+
+
+class IndexType:
+    FLAT = "flat"
+    HNSW = "hnsw"
+    IVF_FLAT = "ivf_flat"
+    IVF_PQ = "ivf_pq"
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Classify a (possibly wrapped) FAISS index into an ``IndexType``."""
+    if isinstance(index, faiss.IndexHNSW):
+        return IndexType.HNSW
+    try:
+        ivf = faiss.downcast_index(faiss.extract_index_ivf(index))
+    except RuntimeError:
+        return IndexType.FLAT
+    return IndexType.IVF_PQ if isinstance(ivf, faiss.IndexIVFPQ) else IndexType.IVF_FLAT
+
+
+def _nlist(ntotal: int) -> int:
+    if settings.IVF_NLIST:
+        return settings.IVF_NLIST
+    # 일반적인 권장값: 4 * sqrt(N), 학습 데이터가 부족하지 않도록 상한 적용
+    return int(min(max(16, 4 * math.sqrt(ntotal)), max(16, ntotal // 39)))
+
+
+def _pq_m(dim: int) -> int:
+    if settings.PQ_M:
+        return settings.PQ_M
+    for m in (96, 64, 48, 32, 24, 16, 8):
+        if dim % m == 0 and m <= dim // 4:
+            return m
+    return 1
+
+
+def factory_string(
+    index_type: str, dim: int, ntotal: int, compression: str = Compression.NONE
+) -> str:
+    storage = storage_factory(compression, _pq_m(dim))
+    if index_type == IndexType.FLAT:
+        return storage
+    if index_type == IndexType.HNSW:
+        if compression == Compression.NONE:
+            return f"HNSW{settings.HNSW_M}"
+        return f"HNSW{settings.HNSW_M}_{storage}"
+    if index_type == IndexType.IVF_FLAT:
+        return f"IVF{_nlist(ntotal)},{storage}"
+    if index_type == IndexType.IVF_PQ:
+        return f"IVF{_nlist(ntotal)},PQ{_pq_m(dim)}"
+    raise ValueError(f"Invalid VECTOR_INDEX_TYPE: {index_type}")
+
+
+def tune(index: faiss.Index) -> faiss.Index:
+    """Apply the configured search-time knobs (efSearch / nprobe)."""
+    index_type = index_type_of(index)
+    if index_type == IndexType.HNSW:
+        index.hnsw.efSearch = settings.HNSW_EF_SEARCH
+    elif index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ):
+        faiss.extract_index_ivf(index).nprobe = settings.IVF_NPROBE
+    return index
+
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """Return the stored vectors in position order (lossy for PQ codes)."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype="float32")
+    if index_type_of(index) in (IndexType.IVF_FLAT, IndexType.IVF_PQ):
+        faiss.extract_index_ivf(index).make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def build_index(
+    index_type: str, vectors: np.ndarray, compression: str = Compression.NONE
+) -> faiss.Index:
+    """Create, train (if needed) and fill an index of the given type."""
+    ntotal, dim = vectors.shape
+    index = faiss.index_factory(
+        dim, factory_string(index_type, dim, ntotal, compression)
+    )
+    if index_type == IndexType.HNSW:
+        index.hnsw.efConstruction = settings.HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return tune(index)
+
+
+def _target_layout(index: faiss.Index) -> Tuple[str, str]:
+    """The (index type, compression) ``index`` should have at its current size.
+
+    Conversions only go one way: an index is never demoted back to flat or
+    decompressed when it shrinks below a threshold.
+    """
+    ntotal = index.ntotal
+    index_type, compression = index_type_of(index), compression_of(index)
+
+    target = settings.VECTOR_INDEX_TYPE
+    if index_type == IndexType.FLAT and target != IndexType.FLAT:
+        threshold = settings.VECTOR_INDEX_PROMOTE_AT
+        if target == IndexType.IVF_PQ:
+            threshold = max(threshold, PQ_MIN_TRAINING_POINTS)
+        if ntotal >= threshold:
+            index_type = target
+
+    target = settings.VECTOR_COMPRESSION
+    if (
+        compression == Compression.NONE
+        and target != Compression.NONE
+        and ntotal >= min_training_points(target)
+    ):
+        compression = target
+
+    if index_type == IndexType.IVF_PQ:
+        # IVF-PQ는 그 자체로 PQ 코드를 저장
+        compression = Compression.PQ
+    return index_type, compression
+
+
+def maybe_promote(store: FAISS, vectors: Optional[VectorSidecar] = None) -> bool:
+    """Convert the index to the configured type / compression once large enough.
+
+    Full-precision ``vectors`` are used to train and fill the new index when
+    available; otherwise the vectors are reconstructed from the index.
+    """
+    current = (index_type_of(store.index), compression_of(store.index))
+    target = _target_layout(store.index)
+    if target == current:
+        return False
+
+    if vectors is not None and len(vectors) == store.index.ntotal:
+        source = vectors.to_array()
+    else:
+        source = reconstruct_all(store.index)
+    # 위치(position) 순서를 그대로 유지하므로 index_to_docstore_id는 바뀌지 않음
+    store.index = build_index(target[0], source, target[1])
+    print(
+        f"Converted vector index to {target[0]} ({target[1]} vectors, "
+        f"{store.index.ntotal} total)"
+    )
+    return True
+
+
+def remove_ids(store: FAISS, ids: List[str], vectors: Optional[VectorSidecar] = None):
+    """Delete docstore IDs from ``store`` for any index type.
+
+    Flat indexes compact on ``remove_ids`` which is what LangChain's
+    ``FAISS.delete`` expects; HNSW cannot remove vectors and IVF keeps stale
+    labels, so approximate indexes are refilled from the kept vectors instead
+    (reusing the trained quantizer). Either way the surviving vectors keep
+    their relative order, and ``vectors`` is compacted the same way.
+    """
+    to_delete = set(ids)
+    keep = [
+        position
+        for position, doc_id in sorted(store.index_to_docstore_id.items())
+        if doc_id not in to_delete
+    ]
+    full = vectors is not None and len(vectors) == store.index.ntotal
+    if vectors is not None:
+        vectors.keep(keep)
+
+    if index_type_of(store.index) == IndexType.FLAT:
+        store.delete(ids)
+        return
+
+    if full:
+        # 압축된 인덱스도 원본 벡터로 다시 채워 재구성 손실이 누적되지 않게 함
+        kept = vectors.to_array()
+    else:
+        kept = reconstruct_all(store.index)[keep]
+
+    index = faiss.clone_index(store.index)
+    index.reset()
+    if len(keep):
+        index.add(kept)
+    store.index = tune(index)
+
+    store.docstore.delete(ids)
+    store.index_to_docstore_id = {
+        new_position: store.index_to_docstore_id[old_position]
+        for new_position, old_position in enumerate(keep)
+    }
+
+
+def filtered_search(
+    index: faiss.Index, query: np.ndarray, k: int, positions: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Search only the given index positions (e.g. the chunks of some PDFs).
+
+    The restriction is applied inside FAISS with an ``IDSelectorBatch``
+    instead of over-fetching and discarding results. Approximate indexes
+    lose recall when the selection is a small fraction of the corpus, so
+    the search effort is scaled by the inverse selectivity, and small HNSW
+    selections are searched exactly.
+    """
+    positions = np.asarray(positions, dtype="int64")
+    query = np.asarray(query, dtype="float32").reshape(1, -1)
+    k = min(k, len(positions))
+    if k == 0:
+        return np.zeros((1, 0), dtype="float32"), np.zeros((1, 0), dtype="int64")
+
+    index_type = index_type_of(index)
+    scale = math.ceil(index.ntotal / len(positions))
+    selector = faiss.IDSelectorBatch(positions)
+
+    if index_type == IndexType.HNSW:
+        if len(positions) <= settings.FILTER_EXACT_SEARCH_MAX:
+            # 그래프 탐색은 선택되지 않은 노드에서 막히므로 선택된 벡터만 직접 비교
+            distances, offsets = faiss.knn(
+                query, index.reconstruct_batch(positions), k, metric=index.metric_type
+            )
+            return distances, positions[offsets]
+        params = faiss.SearchParametersHNSW(
+            sel=selector,
+            efSearch=min(max(settings.HNSW_EF_SEARCH * scale, k), index.ntotal),
+        )
+    elif index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ):
+        ivf = faiss.extract_index_ivf(index)
+        params = faiss.SearchParametersIVF(
+            sel=selector, nprobe=min(settings.IVF_NPROBE * scale, ivf.nlist)
+        )
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(query, k, params=params)
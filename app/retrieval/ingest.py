@@ -0,0 +1,304 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from retrieval.document_index import file_sha256
+from retrieval.pdf_loader import (
+    CachedPDFLoader,
+    PdfBackend,
+    count_pages,
+    load_pdf_pages,
+    pdf_text_cache,
+    release_open_pdfs,
+    resolve_backend,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+CHUNK_BATCH_SIZE = 256
+# 청크 하나의 대략적인 토큰 수 (영문 기준 4글자당 1토큰)
+CHUNK_TOKENS = CHUNK_SIZE // 4
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+# 이 페이지 수 이상인 PDF는 통째로 파싱하지 않고 PAGE_WINDOW 페이지씩 나눠 파싱
+STREAM_MIN_PAGES = 64
+PAGE_WINDOW = 16
+
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True,
+    )
+
+
+def embedding_batch_size(
+    batch_tokens: int, max_batch_size: int, concurrency: int
+) -> int:
+    """Chunks to embed per call so ``concurrency`` API requests can run at once.
+
+    The embedding scheduler splits one call into requests of at most
+    ``batch_tokens`` tokens / ``max_batch_size`` texts; handing it fewer
+    chunks than ``concurrency`` such requests leaves the rest idle.
+    """
+    per_request = max(1, min(max_batch_size, batch_tokens // CHUNK_TOKENS))
+    return max(CHUNK_BATCH_SIZE, per_request * concurrency)
+
+
+def load_and_split(
+    path: str, backend: str = PdfBackend.PYPDF, cached: bool = True
+) -> Tuple[str, int, List[Document]]:
+    """Parse one PDF and split it into chunks (runs in a worker process)."""
+    pages = load_pdf_pages(path, backend, cached)
+    return path, len(pages), get_text_splitter().split_documents(pages)
+
+
+def load_and_split_window(
+    path: str,
+    backend: str,
+    cached: bool,
+    sha256: Optional[str],
+    start: int,
+    stop: int,
+) -> Tuple[str, int, List[Document]]:
+    """Parse pages ``[start, stop)`` of one PDF and split them (runs in a worker).
+
+    Pages are split one by one, so the chunks are the same as when splitting
+    the whole document.
+    """
+    loader = CachedPDFLoader(
+        path, backend, pdf_text_cache if cached else None, sha256=sha256
+    )
+    pages = loader.load_range(start, stop)
+    return path, len(pages), get_text_splitter().split_documents(pages)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # Linux는 KB 단위, 워커 프로세스는 종료 후 RUSAGE_CHILDREN에 집계됨
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+class IngestStats:
+    """처리량/메모리 통계"""
+
+    def __init__(self):
+        self.files = 0
+        self.failed = 0
+        self.pages = 0
+        self.chunks = 0
+        self.duplicates = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        elapsed = self.elapsed
+        rate = self.pages / elapsed if elapsed > 0 else 0.0
+        peak = _peak_rss_mb()
+        line = (
+            f"Ingested {self.files} files ({self.failed} failed), {self.pages} pages, "
+            f"{self.chunks} chunks in {elapsed:.1f}s ({rate:.1f} pages/s)"
+        )
+        if self.duplicates:
+            line += f", {self.duplicates} duplicate chunks skipped"
+        if peak is not None:
+            line += f", peak RSS {peak:.0f} MB"
+        return line
+
+
+class ChunkBatch(NamedTuple):
+    chunks: List[Document]
+    # 이 배치까지 색인하면 확정되는 문서별 체크포인트 (다음 페이지, 끝까지 읽었으면 None)
+    checkpoints: Dict[str, Optional[int]]
+
+
+def _page_count(path: str, backend: str) -> int:
+    try:
+        return count_pages(path, backend)
+    except Exception:
+        # 열 수 없는 파일은 워커에서 파싱할 때 오류로 집계
+        return 0
+
+
+def iter_chunk_batches(
+    pdf_paths: List[str],
+    stats: IngestStats,
+    batch_size: int = CHUNK_BATCH_SIZE,
+    max_workers: int = MAX_WORKERS,
+    backend: str = PdfBackend.PYPDF,
+    cached: bool = True,
+    start_pages: Optional[Dict[str, int]] = None,
+) -> Iterator[ChunkBatch]:
+    """Parse and chunk PDFs, yielding chunks in bounded batches.
+
+    Small PDFs are parsed whole in a process pool with at most
+    ``2 * max_workers`` files in flight. PDFs of ``STREAM_MIN_PAGES`` pages
+    or more, and documents resumed from ``start_pages``, are split into
+    ``PAGE_WINDOW``-page windows that are parsed in the same pool and
+    collected in page order, so memory stays bounded by the batch size plus
+    the windows in flight no matter how long a document is. Each batch
+    carries the checkpoints of the pages it completes. Page text comes from
+    the PDF text cache when the same content was parsed before.
+    """
+    backend = resolve_backend(backend)
+    start_pages = start_pages or {}
+    paths = [path for path in pdf_paths if os.path.exists(path)]
+    page_counts = {path: _page_count(path, backend) for path in paths}
+    streamed = [
+        path
+        for path in paths
+        if path in start_pages or page_counts[path] >= STREAM_MIN_PAGES
+    ]
+    pooled = [path for path in paths if path not in streamed]
+    # 파일 전체가 캐시에 저장되면 완료 표시를 해야 하므로 해시는 한 번만 계산
+    hashes = {path: file_sha256(path) for path in streamed} if cached else {}
+    windows = [
+        (path, page, min(page + PAGE_WINDOW, page_counts[path]))
+        for path in streamed
+        for page in range(start_pages.get(path, 0), page_counts[path], PAGE_WINDOW)
+    ]
+
+    batch: List[Document] = []
+    # (누적 청크 위치, 경로, 다음 페이지): 해당 위치까지 내보내면 체크포인트 확정
+    marks: List[Tuple[int, str, Optional[int]]] = []
+    queued = emitted = 0
+
+    def collect(path: str, chunks: List[Document], next_page: Optional[int]):
+        nonlocal queued
+        stats.chunks += len(chunks)
+        batch.extend(chunks)
+        queued += len(chunks)
+        marks.append((queued, path, next_page))
+
+    def drain(final: bool = False):
+        nonlocal batch, marks, emitted
+        while len(batch) >= batch_size or (final and (batch or marks)):
+            out, batch = batch[:batch_size], batch[batch_size:]
+            emitted += len(out)
+            checkpoints = {path: page for pos, path, page in marks if pos <= emitted}
+            marks = [mark for mark in marks if mark[0] > emitted]
+            yield ChunkBatch(out, checkpoints)
+
+    def collect_file(result):
+        path, page_count, chunks = result
+        stats.files += 1
+        stats.pages += page_count
+        collect(path, chunks, None)
+
+    def collect_window(result, stop: int):
+        path, page_count, chunks = result
+        stats.pages += page_count
+        collect(path, chunks, stop)
+        if stop >= page_counts[path]:
+            stats.files += 1
+            # 처음부터 파싱했을 때만 캐시에 모든 페이지가 저장되어 있음
+            if cached and not start_pages.get(path):
+                pdf_text_cache.finish(hashes[path], backend, page_counts[path])
+            collect(path, [], None)
+
+    for path in streamed:
+        if not page_counts[path]:
+            stats.failed += 1
+            print(f"Error loading {path}: cannot read the page count")
+
+    # 작업이 하나뿐이면 프로세스 풀 기동 비용을 들이지 않고 이 프로세스에서 실행
+    pool = None
+    if max_workers > 1 and len(pooled) + len(windows) > 1:
+        # Streamlit 서버는 멀티스레드이므로 fork 대신 spawn 사용
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def submit(fn, *args) -> Future:
+        if pool is not None:
+            return pool.submit(fn, *args)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    try:
+        pending = {}
+        remaining = iter(pooled)
+        while True:
+            while len(pending) < 2 * max_workers:
+                path = next(remaining, None)
+                if path is None:
+                    break
+                pending[submit(load_and_split, path, backend, cached)] = path
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    collect_file(future.result())
+                except Exception as e:
+                    stats.failed += 1
+                    print(f"Error loading {path}: {e}")
+            yield from drain()
+
+        # 긴 문서의 페이지 구간은 병렬로 파싱하되 체크포인트 순서를 위해 순서대로 수집
+        failed = set()
+        in_flight = deque()
+        remaining = iter(windows)
+        while True:
+            while len(in_flight) < 2 * max_workers:
+                window = next(remaining, None)
+                if window is None:
+                    break
+                path, start, stop = window
+                if path in failed:
+                    continue
+                future = submit(
+                    load_and_split_window,
+                    path,
+                    backend,
+                    cached,
+                    hashes.get(path),
+                    start,
+                    stop,
+                )
+                in_flight.append((window, future))
+            if not in_flight:
+                break
+
+            (path, start, stop), future = in_flight.popleft()
+            if path in failed:
+                future.cancel()
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                # 이미 내보낸 페이지는 체크포인트로 남아 다음 색인 때 이어서 처리
+                failed.add(path)
+                stats.failed += 1
+                print(f"Error loading {path} at page {start}: {e}")
+                continue
+            collect_window(result, stop)
+            yield from drain()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        release_open_pdfs()
+
+    yield from drain(final=True)
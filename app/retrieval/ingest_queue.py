@@ -0,0 +1,224 @@
+import datetime
+import os
+import queue
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from retrieval.summaries import needs_summary, summarize_pdf
+from retrieval.vector_store import (
+    add_pdfs_to_vector_store,
+    delete_document_from_vector_store,
+    list_indexed_documents,
+    rebuild_index,
+    rename_document_in_vector_store,
+)
+from utils.config import settings
+
+
+class JobStatus:
+    QUEUED = "queued"
+    PARSING = "parsing"
+    EMBEDDING = "embedding"
+    SUMMARIZING = "summarizing"
+    INDEXED = "indexed"
+    FAILED = "failed"
+
+
+ACTIVE_STATUSES = (
+    JobStatus.QUEUED,
+    JobStatus.PARSING,
+    JobStatus.EMBEDDING,
+    JobStatus.SUMMARIZING,
+)
+
+
+class Lane:
+    INDEX = "index"
+    SUMMARY = "summary"
+
+
+MAX_FINISHED_JOBS = 50
+
+
+class IngestionQueue:
+    """벡터 스토어 쓰기 작업을 처리하는 단일 백그라운드 워커
+
+    업로드/삭제/이름 변경/재색인 작업을 큐에 넣으면 워커 스레드 하나가 순서대로
+    실행하므로 Streamlit 스크립트가 임베딩을 기다리며 멈추지 않고, 같은
+    프로세스의 세션들이 동시에 인덱스를 쓰지 않습니다. (다른 프로세스와의
+    직렬화는 VectorStoreService의 파일 잠금이 담당)
+
+    문서 요약 생성은 인덱스를 쓰지 않고 LLM 호출로 오래 걸리므로 별도 워커
+    스레드(summary lane)에서 실행해 색인 작업을 막지 않습니다.
+    """
+
+    # Singleton 패턴 적용
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(IngestionQueue, cls).__new__(cls)
+            cls._instance._queues = {
+                lane: queue.Queue() for lane in (Lane.INDEX, Lane.SUMMARY)
+            }
+            cls._instance._jobs = {}
+            cls._instance._lock = threading.Lock()
+            cls._instance._workers = {}
+        return cls._instance
+
+    def _ensure_worker(self, lane: str):
+        with self._lock:
+            worker = self._workers.get(lane)
+            if worker is None or not worker.is_alive():
+                worker = threading.Thread(
+                    target=self._run,
+                    args=(self._queues[lane],),
+                    name=f"ingestion-{lane}-worker",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers[lane] = worker
+
+    def _submit(
+        self,
+        kind: str,
+        label: str,
+        task: Callable[[Callable], Any],
+        lane: str = Lane.INDEX,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "label": label,
+                "status": JobStatus.QUEUED,
+                "progress": 0.0,
+                "error": None,
+                "created": now,
+                "updated": now,
+            }
+            self._prune()
+        self._queues[lane].put((job_id, task))
+        self._ensure_worker(lane)
+        return job_id
+
+    def _prune(self):
+        finished = [
+            job for job in self._jobs.values() if job["status"] not in ACTIVE_STATUSES
+        ]
+        finished.sort(key=lambda job: job["updated"])
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job["id"]]
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                job["updated"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _run(self, jobs: queue.Queue):
+        while True:
+            job_id, task = jobs.get()
+
+            def progress(stage: str, fraction: float, job_id=job_id):
+                self._update(
+                    job_id, status=stage, progress=min(max(fraction, 0.0), 1.0)
+                )
+
+            try:
+                error = task(progress)
+                if error:
+                    self._update(job_id, status=JobStatus.FAILED, error=error)
+                else:
+                    self._update(job_id, status=JobStatus.INDEXED, progress=1.0)
+            except Exception as e:
+                print(f"Ingestion job {job_id} failed: {e}")
+                self._update(job_id, status=JobStatus.FAILED, error=str(e))
+            finally:
+                jobs.task_done()
+
+    def submit_add(self, pdf_paths: List[str]) -> str:
+        def task(progress):
+            stats = add_pdfs_to_vector_store(pdf_paths, progress=progress)
+            if stats is None:
+                return "색인 저장에 실패했습니다."
+            self._submit_summaries(pdf_paths)
+            missing = len(pdf_paths) - stats.files
+            if missing:
+                return f"{missing}개 파일을 읽지 못했습니다."
+            return None
+
+        label = ", ".join(path.rsplit("/", 1)[-1] for path in pdf_paths)
+        return self._submit("add", label, task)
+
+    def submit_delete(self, filename: str) -> str:
+        def task(progress):
+            if not delete_document_from_vector_store(filename):
+                return "색인에서 문서를 삭제하지 못했습니다."
+            return None
+
+        return self._submit("delete", filename, task)
+
+    def submit_rename(self, old_path: str, new_path: str) -> str:
+        def task(progress):
+            if not rename_document_in_vector_store(old_path, new_path):
+                return "색인의 문서 이름을 바꾸지 못했습니다."
+            return None
+
+        return self._submit("rename", new_path.rsplit("/", 1)[-1], task)
+
+    def submit_rebuild(self) -> str:
+        def task(progress):
+            if not rebuild_index(progress=progress):
+                return "재색인에 실패했습니다."
+            self._submit_summaries(
+                [entry["source"] for entry in list_indexed_documents().values()]
+            )
+            return None
+
+        return self._submit("rebuild", "전체 재색인", task)
+
+    def submit_summary(self, pdf_path: str) -> str:
+        def task(progress):
+            summary = summarize_pdf(
+                pdf_path, lambda fraction: progress(JobStatus.SUMMARIZING, fraction)
+            )
+            if summary is None:
+                return "요약 생성에 실패했습니다."
+            return None
+
+        return self._submit(
+            "summary", pdf_path.rsplit("/", 1)[-1], task, lane=Lane.SUMMARY
+        )
+
+    def _submit_summaries(self, pdf_paths: List[str]):
+        """Queue summary jobs for indexed PDFs that have no stored summary."""
+        if not settings.SUMMARY_PRECOMPUTE:
+            return
+        for path in pdf_paths:
+            try:
+                if os.path.exists(path) and needs_summary(path):
+                    self.submit_summary(path)
+            except Exception as e:
+                print(f"Error queueing summary for {path}: {e}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Snapshot of the job table, newest first."""
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
+
+    def has_active_jobs(self) -> bool:
+        with self._lock:
+            return any(job["status"] in ACTIVE_STATUSES for job in self._jobs.values())
+
+
+ingestion_queue = IngestionQueue()
@@ -0,0 +1,322 @@
+import glob
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Tuple
+
+import pypdf
+from langchain_community.document_loaders import PyMuPDFLoader, PyPDFLoader
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from retrieval.document_index import file_sha256
+
+try:
+    import pymupdf
+except ImportError:  # 선택 의존성 (pip install pymupdf)
+    pymupdf = None
+
+PDF_TEXT_CACHE_PATH = "app/storage/pdf_text_cache.db"
+# 캐시 읽기/쓰기 단위 (한 파일의 전체 페이지를 한 번에 메모리에 올리지 않음)
+CACHE_PAGE_BATCH = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_pages (
+    sha256 TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (sha256, backend, page)
+);
+-- 모든 페이지가 저장된 파일만 기록 (중간에 실패한 추출은 캐시로 쓰지 않음)
+CREATE TABLE IF NOT EXISTS pdf_files (
+    sha256 TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    PRIMARY KEY (sha256, backend)
+);
+"""
+
+
+class PdfBackend:
+    PYPDF = "pypdf"
+    PYMUPDF = "pymupdf"
+
+
+def resolve_backend(backend: str) -> str:
+    """Validate ``backend``, falling back to pypdf if PyMuPDF is not installed."""
+    if backend not in (PdfBackend.PYPDF, PdfBackend.PYMUPDF):
+        raise ValueError(f"Invalid PDF_LOADER: {backend}")
+    if backend == PdfBackend.PYMUPDF and pymupdf is None:
+        print("PyMuPDF is not installed, falling back to pypdf")
+        return PdfBackend.PYPDF
+    return backend
+
+
+def count_pages(path: str, backend: str = PdfBackend.PYPDF) -> int:
+    """Number of pages, read from the page tree without extracting any text."""
+    if backend == PdfBackend.PYMUPDF:
+        with pymupdf.open(path) as doc:
+            return doc.page_count
+    return len(pypdf.PdfReader(path).pages)
+
+
+def _backend_loader(path: str, backend: str) -> BaseLoader:
+    if backend == PdfBackend.PYMUPDF:
+        return PyMuPDFLoader(path)
+    return PyPDFLoader(path)
+
+
+@lru_cache(maxsize=1)
+def _open_pdf(path: str, backend: str, mtime: float) -> Tuple[Any, Optional[dict]]:
+    """Parsed document and loader metadata, reused by the windows of one file.
+
+    ``mtime`` only keys the cache. The document is read from memory so no
+    file handle stays open.
+    """
+    first = next(_backend_loader(path, backend).lazy_load(), None)
+    with open(path, "rb") as f:
+        data = f.read()
+    if backend == PdfBackend.PYMUPDF:
+        doc = pymupdf.open(stream=data, filetype="pdf")
+    else:
+        doc = pypdf.PdfReader(io.BytesIO(data))
+    return doc, first.metadata if first else None
+
+
+def release_open_pdfs():
+    """Drop the document kept open for page-window parsing."""
+    _open_pdf.cache_clear()
+
+
+def _extract_pages(path: str, backend: str, start: int, stop: int) -> List[Document]:
+    """Pages ``[start, stop)`` as the backend loader yields them.
+
+    The loaders always parse from the first page; here only the requested
+    pages are extracted, with the document metadata (producer, page count,
+    ...) taken from the loader's first page.
+    """
+    doc, metadata = _open_pdf(path, backend, os.path.getmtime(path))
+    if metadata is None:
+        return []
+    if backend == PdfBackend.PYMUPDF:
+        return [
+            Document(
+                page_content=doc[number].get_text().strip(),
+                metadata={**metadata, "page": number},
+            )
+            for number in range(start, min(stop, doc.page_count))
+        ]
+
+    pages = []
+    for number in range(start, min(stop, len(doc.pages))):
+        text = doc.pages[number].extract_text(extraction_mode="plain")
+        pages.append(
+            Document(
+                page_content=text.strip(),
+                metadata={
+                    **metadata,
+                    "page": number,
+                    "page_label": doc.page_labels[number],
+                },
+            )
+        )
+    return pages
+
+
+class PdfTextCache:
+    """SQLite 기반 페이지 텍스트 캐시 (키: PDF 내용 해시 + 추출 백엔드)
+
+    같은 내용의 PDF는 파일명이 바뀌거나 다시 업로드되어도 재파싱하지 않습니다.
+    색인 워커 프로세스들이 같은 파일에 동시에 쓸 수 있으므로 연결은 스레드마다
+    따로 두고 잠금 대기 시간을 넉넉히 잡습니다.
+    """
+
+    def __init__(self, path: str = PDF_TEXT_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def page_count(self, sha256: str, backend: str) -> Optional[int]:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT pages FROM pdf_files WHERE sha256 = ? AND backend = ?",
+                (sha256, backend),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def get(
+        self, sha256: str, backend: str, start: int = 0, stop: Optional[int] = None
+    ) -> Optional[List[Tuple[str, dict]]]:
+        """Return cached (text, metadata) pairs for pages ``[start, stop)``."""
+        if self.page_count(sha256, backend) is None:
+            return None
+        rows = self._connect().execute(
+            "SELECT page_content, metadata FROM pdf_pages "
+            "WHERE sha256 = ? AND backend = ? AND page >= ? AND page < ? ORDER BY page",
+            (sha256, backend, start, stop if stop is not None else sys.maxsize),
+        )
+        return [(text, json.loads(metadata)) for text, metadata in rows]
+
+    def put_pages(self, sha256: str, backend: str, start: int, pages: List[Document]):
+        """Store pages ``start..`` of a file whose extraction is still running."""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pdf_pages "
+                "(sha256, backend, page, page_content, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        sha256,
+                        backend,
+                        start + i,
+                        doc.page_content,
+                        json.dumps(doc.metadata, ensure_ascii=False),
+                    )
+                    for i, doc in enumerate(pages)
+                ],
+            )
+
+    def finish(self, sha256: str, backend: str, pages: int):
+        """Mark a file's pages as complete so later loads are served from cache."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_files (sha256, backend, pages) VALUES (?, ?, ?)",
+                (sha256, backend, pages),
+            )
+
+
+pdf_text_cache = PdfTextCache()
+
+
+class CachedPDFLoader(BaseLoader):
+    """PDF loader that reuses per-page text extracted from identical content.
+
+    Yields the same per-page documents as the configured backend loader, with
+    ``source`` pointing at ``path`` even when the text was first extracted
+    from a copy under another name. Pages are read and stored in small
+    batches; ``load_range`` reads a page window on its own.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        backend: str = PdfBackend.PYPDF,
+        cache: Optional[PdfTextCache] = pdf_text_cache,
+        sha256: Optional[str] = None,
+    ):
+        self.path = path
+        self.backend = backend
+        self.cache = cache
+        self.sha256 = sha256
+
+    def _with_source(self, text: str, metadata: dict) -> Document:
+        metadata = {**metadata, "source": self.path}
+        if "file_path" in metadata:
+            metadata["file_path"] = self.path
+        return Document(page_content=text, metadata=metadata)
+
+    def lazy_load(self) -> Iterator[Document]:
+        pages = _backend_loader(self.path, self.backend).lazy_load()
+        if self.cache is None:
+            yield from pages
+            return
+
+        sha256 = self.sha256 or file_sha256(self.path)
+        total = self.cache.page_count(sha256, self.backend)
+        if total is not None:
+            for start in range(0, total, CACHE_PAGE_BATCH):
+                cached = self.cache.get(
+                    sha256, self.backend, start, start + CACHE_PAGE_BATCH
+                )
+                for text, metadata in cached:
+                    yield self._with_source(text, metadata)
+            return
+
+        batch: List[Document] = []
+        count = 0
+        for count, doc in enumerate(pages, start=1):
+            batch.append(doc)
+            yield doc
+            if len(batch) >= CACHE_PAGE_BATCH:
+                self.cache.put_pages(sha256, self.backend, count - len(batch), batch)
+                batch = []
+        self.cache.put_pages(sha256, self.backend, count - len(batch), batch)
+        self.cache.finish(sha256, self.backend, count)
+
+    def load_range(self, start: int, stop: int) -> List[Document]:
+        """Pages ``[start, stop)`` without parsing the pages before them.
+
+        Lets the page windows of one file be parsed in separate processes.
+        Extracted pages are stored in the cache, but the file is only served
+        from it once the caller marks it complete with ``PdfTextCache.finish``
+        after every window has been stored.
+        """
+        if self.cache is None:
+            return _extract_pages(self.path, self.backend, start, stop)
+
+        sha256 = self.sha256 or file_sha256(self.path)
+        cached = self.cache.get(sha256, self.backend, start, stop)
+        if cached is not None:
+            return [self._with_source(text, metadata) for text, metadata in cached]
+        pages = _extract_pages(self.path, self.backend, start, stop)
+        self.cache.put_pages(sha256, self.backend, start, pages)
+        return pages
+
+
+def load_pdf_pages(
+    path: str, backend: str = PdfBackend.PYPDF, cached: bool = True
+) -> List[Document]:
+    """Per-page documents of one PDF, from the text cache when possible."""
+    return CachedPDFLoader(path, backend, pdf_text_cache if cached else None).load()
+
+
+if __name__ == "__main__":
+    # 백엔드별 파싱 처리량 벤치마크: python app/retrieval/pdf_loader.py [PDF ...]
+    paths = sys.argv[1:] or sorted(glob.glob("app/storage/raw/*.pdf"))
+    if not paths:
+        sys.exit("usage: python app/retrieval/pdf_loader.py PDF [PDF ...]")
+    backends = [PdfBackend.PYPDF] + ([PdfBackend.PYMUPDF] if pymupdf else [])
+    if pymupdf is None:
+        print("PyMuPDF is not installed, benchmarking pypdf only")
+
+    def run(backend: str, cache: Optional[PdfTextCache]) -> Tuple[int, int, float]:
+        started = time.perf_counter()
+        pages = chars = 0
+        for path in paths:
+            for doc in CachedPDFLoader(path, backend, cache).lazy_load():
+                pages += 1
+                chars += len(doc.page_content)
+        return pages, chars, time.perf_counter() - started
+
+    print(f"{len(paths)} files")
+    print(
+        f"{'backend':<10}{'mode':<8}{'pages':>8}{'chars':>12}{'seconds':>10}{'pages/s':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PdfTextCache(os.path.join(tmp, "bench.db"))
+        for backend in backends:
+            for mode, target in (("parse", None), ("fill", cache), ("cached", cache)):
+                pages, chars, elapsed = run(backend, target)
+                rate = pages / elapsed if elapsed > 0 else 0.0
+                print(
+                    f"{backend:<10}{mode:<8}{pages:>8}{chars:>12}{elapsed:>10.2f}{rate:>10.1f}"
+                )
@@ -0,0 +1,262 @@
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from retrieval.document_index import file_sha256
+from retrieval.pdf_loader import load_pdf_pages, resolve_backend
+from utils.config import get_llm, get_llm_model_name, settings
+
+SUMMARY_STORE_PATH = "app/storage/summaries.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS document_summaries (
+    sha256 TEXT NOT NULL,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created TEXT NOT NULL,
+    PRIMARY KEY (sha256, model)
+);
+CREATE TABLE IF NOT EXISTS section_summaries (
+    sha256 TEXT NOT NULL,
+    model TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    PRIMARY KEY (sha256, model, seq)
+);
+"""
+
+SECTION_PROMPT = "You summarize one section of a research paper. Write a dense, factual summary that keeps the key claims, methods, results and numbers."
+DOCUMENT_PROMPT = "You combine section summaries of a research paper into one summary of the whole paper: the problem, the approach, the key results with numbers, and the limitations."
+# 요약이 줄지 않는 경우를 대비한 map/reduce 반복 횟수 상한
+MAX_SUMMARY_LEVELS = 3
+
+
+def pack(texts: List[str], limit: int) -> List[str]:
+    """Join consecutive texts into groups of at most ``limit`` characters."""
+    groups: List[str] = []
+    current: List[str] = []
+    size = 0
+    for text in texts:
+        if current and size + len(text) > limit:
+            groups.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
+
+
+def run_summaries(
+    inputs: List[List[BaseMessage]],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> List[str]:
+    """Run summary prompts in parallel (``SUMMARY_MAP_CONCURRENCY`` at a time).
+
+    Returns one summary per input, in order; failed calls are logged and
+    give an empty string so the rest can still be used.
+    """
+    summaries = [""] * len(inputs)
+    if on_progress:
+        on_progress(0, len(inputs))
+    completed = 0
+    for i, output in get_llm().batch_as_completed(
+        inputs,
+        # 중간 요약은 답변이 아니므로 워크플로 토큰 스트림에서 제외
+        config={
+            "max_concurrency": settings.SUMMARY_MAP_CONCURRENCY,
+            "tags": ["nostream"],
+        },
+        return_exceptions=True,
+    ):
+        completed += 1
+        if isinstance(output, Exception):
+            print(f"Error summarizing input {i}: {output}")
+        else:
+            summaries[i] = output.content
+        if on_progress:
+            on_progress(completed, len(inputs))
+    return summaries
+
+
+class DocumentSummary(NamedTuple):
+    summary: str
+    # (페이지 범위, 구간 요약)
+    sections: List[Tuple[str, str]]
+
+
+class SummaryStore:
+    """SQLite 기반 문서 요약 저장소 (키: PDF 내용 해시 + 요약 모델)
+
+    요약은 PDF 내용이 바뀌지 않는 한 같으므로 색인 시 한 번 만들어 두고,
+    파일명이 바뀌거나 같은 파일을 다시 올려도 그대로 재사용합니다.
+    """
+
+    def __init__(self, path: str = SUMMARY_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, hashes: Iterable[str], model: str) -> Dict[str, DocumentSummary]:
+        hashes = list(hashes)
+        conn = self._connect()
+        found: Dict[str, DocumentSummary] = {}
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for sha256, summary in conn.execute(
+                "SELECT sha256, summary FROM document_summaries "
+                f"WHERE model = ? AND sha256 IN ({placeholders})",
+                [model] + batch,
+            ):
+                found[sha256] = DocumentSummary(summary, [])
+            for sha256, title, summary in conn.execute(
+                "SELECT sha256, title, summary FROM section_summaries "
+                f"WHERE model = ? AND sha256 IN ({placeholders}) ORDER BY sha256, seq",
+                [model] + batch,
+            ):
+                if sha256 in found:
+                    found[sha256].sections.append((title, summary))
+        return found
+
+    def get(self, sha256: str, model: str) -> Optional[DocumentSummary]:
+        return self.get_many([sha256], model).get(sha256)
+
+    def put(self, sha256: str, model: str, summary: DocumentSummary):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM section_summaries WHERE sha256 = ? AND model = ?",
+                (sha256, model),
+            )
+            conn.executemany(
+                "INSERT INTO section_summaries (sha256, model, seq, title, summary) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (sha256, model, seq, title, text)
+                    for seq, (title, text) in enumerate(summary.sections)
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO document_summaries "
+                "(sha256, model, summary, created) VALUES (?, ?, ?, ?)",
+                (
+                    sha256,
+                    model,
+                    summary.summary,
+                    datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                ),
+            )
+
+
+summary_store = SummaryStore()
+
+
+def _page_sections(pages: List[Document], limit: int) -> List[Tuple[str, str]]:
+    """Group consecutive pages into sections of at most ``limit`` characters."""
+    sections: List[Tuple[str, str]] = []
+    current: List[Document] = []
+    size = 0
+
+    def close():
+        first = current[0].metadata.get("page", 0) + 1
+        last = current[-1].metadata.get("page", 0) + 1
+        label = f"p. {first}" if first == last else f"pp. {first}-{last}"
+        sections.append((label, "\n".join(page.page_content for page in current)))
+
+    for page in pages:
+        if current and size + len(page.page_content) > limit:
+            close()
+            current, size = [], 0
+        current.append(page)
+        size += len(page.page_content)
+    if current:
+        close()
+    return sections
+
+
+def _prompt(system: str, content: str) -> List[BaseMessage]:
+    return [SystemMessage(content=system), HumanMessage(content=content)]
+
+
+def needs_summary(path: str) -> bool:
+    """Whether no summary is stored yet for the current content of ``path``."""
+    return summary_store.get(file_sha256(path), get_llm_model_name()) is None
+
+
+def summarize_pdf(
+    path: str, progress: Optional[Callable[[float], None]] = None
+) -> Optional[DocumentSummary]:
+    """Summarize one PDF section by section, then as a whole, and store it.
+
+    Returns the stored summary right away if one exists for the same
+    content, or None if no section could be summarized.
+    """
+    sha256, model = file_sha256(path), get_llm_model_name()
+    existing = summary_store.get(sha256, model)
+    if existing is not None:
+        return existing
+
+    name = os.path.basename(path)
+    limit = settings.SUMMARY_MAP_CHARS
+    pages = load_pdf_pages(
+        path, resolve_backend(settings.PDF_LOADER), settings.PDF_TEXT_CACHE
+    )
+    sections = _page_sections(pages, limit)
+
+    def on_progress(done: int, total: int):
+        # 구간 요약이 대부분의 시간을 차지
+        if progress:
+            progress(0.9 * done / max(total, 1))
+
+    summaries = run_summaries(
+        [
+            _prompt(SECTION_PROMPT, f"Paper: {name}, {label}\n\n{text}")
+            for label, text in sections
+        ],
+        on_progress,
+    )
+    sections = [
+        (label, summary) for (label, _), summary in zip(sections, summaries) if summary
+    ]
+    if not sections:
+        return None
+
+    # 구간이 하나면 그 요약이 곧 문서 요약
+    texts = [summary for _, summary in sections]
+    if len(sections) > 1:
+        texts = [f"{label}: {summary}" for label, summary in sections]
+    for _ in range(MAX_SUMMARY_LEVELS if len(texts) > 1 else 0):
+        texts = [
+            summary
+            for summary in run_summaries(
+                [
+                    _prompt(DOCUMENT_PROMPT, f"Paper: {name}\n\n{group}")
+                    for group in pack(texts, limit)
+                ]
+            )
+            if summary
+        ]
+        if len(texts) <= 1:
+            break
+    if not texts:
+        return None
+
+    result = DocumentSummary("\n\n".join(texts), sections)
+    summary_store.put(sha256, model, result)
+    if progress:
+        progress(1.0)
+    return result
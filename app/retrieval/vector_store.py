@@ -1,162 +1,960 @@
+import json
 import os
 import shutil
-from typing import Any, Dict, List, Optional
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from langchain_community.document_loaders import PyPDFLoader
+import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from utils.config import get_embeddings
+from retrieval.compression import (
+    Compression,
+    VectorSidecar,
+    compression_of,
+    rerank,
+)
+from retrieval.dedup import Deduplicator
+from retrieval.docstore import SQLiteDocstore
+from retrieval.document_index import DocumentIndex, file_fingerprint
+from retrieval.embedding_cache import CachedEmbeddings
+from retrieval.file_lock import WriterLock, file_lock
+from retrieval.hybrid import (
+    RetrievalMode,
+    fts_query,
+    is_lexical_query,
+    reciprocal_rank_fusion,
+)
+from retrieval.index_factory import (
+    filtered_search,
+    maybe_promote,
+    reconstruct_all,
+    remove_ids,
+    tune,
+)
+from retrieval.ingest import IngestStats, embedding_batch_size, iter_chunk_batches
+from retrieval.query_cache import LRUCache, normalize_query
+from utils.config import get_embedding_model_name, get_embeddings, settings
 
 VECTOR_STORE_PATH = "app/storage/vector_store"
 RAW_DATA_PATH = "app/storage/raw"
 INDEX_NAME = "index"
+DOCSTORE_NAME = "docstore.sqlite"
 
+# (stage, fraction) 진행 상황 콜백
+ProgressCallback = Callable[[str, float], None]
 
-def get_vector_store() -> Optional[FAISS]:
-    """Load the existing vector store from disk if it exists."""
-    if os.path.exists(os.path.join(VECTOR_STORE_PATH, f"{INDEX_NAME}.faiss")):
-        try:
-            return FAISS.load_local(
-                VECTOR_STORE_PATH,
-                get_embeddings(),
-                allow_dangerous_deserialization=True,
+
+class IndexSnapshot(NamedTuple):
+    """한 시점의 FAISS 스토어와 사이드 인덱스 묶음 (함께 교체됨)"""
+
+    store: FAISS
+    documents: DocumentIndex
+    # 압축 저장 시 재정렬/재학습에 쓰는 원본 벡터 (압축하지 않으면 None)
+    vectors: Optional[VectorSidecar] = None
+
+
+class VectorStoreService:
+    """프로세스 전역에서 공유하는 FAISS 핸들
+
+    인덱스는 프로세스당 한 번만 로드하고, 디스크의 인덱스 파일이 바뀌면
+    (mtime/size 스탬프) 다시 로드합니다. 읽기는 현재 스냅샷 참조만 가져가고,
+    쓰기는 복사본을 수정한 뒤 저장과 함께 참조를 원자적으로 교체합니다.
+
+    벡터는 메모리 매핑으로 열고 청크 텍스트/메타데이터는 SQLite docstore에서
+    필요할 때만 읽으므로, 여러 프로세스가 페이지를 공유하고 콜드 스타트
+    비용이 코퍼스 크기에 비례하지 않습니다.
+    """
+
+    # Singleton 패턴 적용
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(VectorStoreService, cls).__new__(cls)
+            cls._instance._snapshot = None
+            cls._instance._version = None
+            cls._instance._embeddings = None
+            # (질의, k, 모드, 인덱스 버전) -> 청크 ID
+            cls._instance.search_cache = LRUCache(settings.SEARCH_RESULT_CACHE_SIZE)
+            cls._instance._positions = (None, {})
+            cls._instance._load_lock = threading.Lock()
+            # 프로세스 내 스레드와 다른 Streamlit 프로세스의 쓰기를 모두 직렬화
+            cls._instance.write_lock = WriterLock(
+                os.path.join(VECTOR_STORE_PATH, ".write.lock")
             )
-        except Exception as e:
-            print(f"Error loading vector store: {e}")
+        return cls._instance
+
+    def _index_files(self) -> Tuple[str, str]:
+        return (
+            os.path.join(VECTOR_STORE_PATH, f"{INDEX_NAME}.faiss"),
+            os.path.join(VECTOR_STORE_PATH, f"{INDEX_NAME}.ids.json"),
+        )
+
+    def _sidecar_files(self) -> Tuple[str, ...]:
+        return (os.path.join(VECTOR_STORE_PATH, f"{INDEX_NAME}.docs.json"),)
+
+    def _vectors_path(self) -> str:
+        return os.path.join(VECTOR_STORE_PATH, f"{INDEX_NAME}.vectors.f32")
+
+    def _docstore_path(self) -> str:
+        return os.path.join(VECTOR_STORE_PATH, DOCSTORE_NAME)
+
+    def _legacy_pickle(self) -> str:
+        return os.path.join(VECTOR_STORE_PATH, f"{INDEX_NAME}.pkl")
+
+    def _commit_lock(self, shared: bool = False):
+        # 파일 교체 중에는 다른 프로세스가 반쯤 바뀐 인덱스를 읽지 않도록 잠금
+        return file_lock(os.path.join(VECTOR_STORE_PATH, ".commit.lock"), shared)
+
+    def _disk_version(self) -> Optional[Tuple[int, ...]]:
+        """Version stamp of the on-disk index, or None if there is no index."""
+        try:
+            stats = [os.stat(path) for path in self._index_files()]
+        except FileNotFoundError:
             return None
-    return None
+        return tuple(v for st in stats for v in (st.st_mtime_ns, st.st_size))
+
+    def embeddings(self) -> CachedEmbeddings:
+        # close_clients()로 공유 모델이 다시 만들어졌으면 캐시 래퍼도 새로 구성
+        backend = get_embeddings()
+        if self._embeddings is None or self._embeddings.embeddings is not backend:
+            self._embeddings = CachedEmbeddings(
+                backend,
+                get_embedding_model_name(),
+                query_cache_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+                persist_queries=settings.QUERY_EMBEDDING_PERSIST,
+            )
+        return self._embeddings
 
+    def embedding_stats(self) -> Dict[str, int]:
+        """Cumulative embedding cache hit/miss counters for this process."""
+        return self.embeddings().stats()
 
-def add_pdfs_to_vector_store(pdf_paths: List[str]):
-    """Add new PDFs to the persistent vector store."""
-    if not pdf_paths:
-        return
+    @property
+    def version(self) -> Optional[Tuple[int, ...]]:
+        return self._version
 
-    documents = []
-    for path in pdf_paths:
-        if os.path.exists(path):
+    def _read_index(self, path: str) -> faiss.Index:
+        try:
+            # 읽기 전용 메모리 매핑: 페이지 캐시를 프로세스 간에 공유
+            return faiss.read_index(
+                path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            )
+        except RuntimeError:
+            return faiss.read_index(path)
+
+    def _load(self) -> IndexSnapshot:
+        index_path, ids_path = self._index_files()
+        with open(ids_path, "r", encoding="utf-8") as f:
+            index_to_docstore_id = dict(enumerate(json.load(f)))
+        docstore = SQLiteDocstore(self._docstore_path())
+        store = FAISS(
+            self.embeddings(),
+            tune(self._read_index(index_path)),
+            docstore,
+            index_to_docstore_id,
+        )
+        vectors = VectorSidecar.open(self._vectors_path(), store.index.d)
+        if vectors is not None and len(vectors) != store.index.ntotal:
+            print("Ignoring full-precision vectors that do not match the index")
+            vectors = None
+        documents = DocumentIndex.load(self._sidecar_files()[0])
+        if documents is None or documents.chunk_count() != len(index_to_docstore_id):
+            # 사이드 인덱스가 없거나 어긋나면 docstore에서 한 번 재구성
+            documents = DocumentIndex.from_documents(
+                (doc.id, doc) for doc in docstore.iter_documents()
+            )
+        return IndexSnapshot(store, documents, vectors)
+
+    def _migrate_legacy(self):
+        """Convert a pickled LangChain FAISS store to the mmap + SQLite layout."""
+        with self.write_lock:
+            if self._disk_version() is not None or not os.path.exists(
+                self._legacy_pickle()
+            ):
+                return
+            print("Migrating pickled vector store to SQLite docstore...")
+            legacy = FAISS.load_local(
+                VECTOR_STORE_PATH,
+                self.embeddings(),
+                index_name=INDEX_NAME,
+                allow_dangerous_deserialization=True,
+            )
+            snapshot = self._from_langchain_store(legacy)
+            self.commit(snapshot)
+            os.remove(self._legacy_pickle())
+
+    def snapshot(self) -> Optional[IndexSnapshot]:
+        """Return the current index, reloading it if the files changed."""
+        version = self._disk_version()
+        if version is None and os.path.exists(self._legacy_pickle()):
             try:
-                loader = PyPDFLoader(path)
-                docs = loader.load()
-                documents.extend(docs)
+                self._migrate_legacy()
             except Exception as e:
-                print(f"Error loading {path}: {e}")
+                print(f"Error migrating vector store: {e}")
+            version = self._disk_version()
+
+        if version == self._version:
+            return self._snapshot
+
+        with self._load_lock:
+            with self._commit_lock(shared=True):
+                version = self._disk_version()
+                if version == self._version:
+                    return self._snapshot
+                if version is None:
+                    snapshot = None
+                else:
+                    try:
+                        snapshot = self._load()
+                    except Exception as e:
+                        print(f"Error loading vector store: {e}")
+                        return self._snapshot
+            self._swap(snapshot, version)
+            return snapshot
+
+    def editable(self) -> Optional[IndexSnapshot]:
+        """Return a private copy of the current index for a writer to mutate.
+
+        Callers must hold ``write_lock`` until ``commit``. Readers holding the
+        previous snapshot are never affected by the writer's changes.
+        """
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        store = snapshot.store
+        return IndexSnapshot(
+            FAISS(
+                store.embedding_function,
+                # 메모리 매핑된 인덱스는 수정할 수 없으므로 소유 메모리로 복사
+                faiss.deserialize_index(faiss.serialize_index(store.index)),
+                store.docstore.fork(),
+                dict(store.index_to_docstore_id),
+            ),
+            snapshot.documents.copy(),
+            (
+                snapshot.vectors.copy()
+                if snapshot.vectors is not None
+                else self._initial_vectors(store.index)
+            ),
+        )
+
+    def _initial_vectors(self, index: faiss.Index) -> Optional[VectorSidecar]:
+        """Start a full-precision copy before an index is first compressed."""
+        if (
+            settings.VECTOR_COMPRESSION == Compression.NONE
+            or compression_of(index) != Compression.NONE
+        ):
+            return None
+        return VectorSidecar.from_array(reconstruct_all(index))
+
+    def _from_langchain_store(
+        self, store: FAISS, documents: Optional[DocumentIndex] = None
+    ) -> IndexSnapshot:
+        docs = store.docstore._dict
+        docstore = SQLiteDocstore(self._docstore_path()).fork()
+        docstore.update(docs)
+        store.docstore = docstore
+        if documents is None:
+            documents = DocumentIndex()
+        for doc_id, doc in docs.items():
+            documents.add(doc_id, doc)
+        return IndexSnapshot(store, documents, self._initial_vectors(store.index))
+
+    def new_snapshot(
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        index: Optional[DocumentIndex] = None,
+    ) -> IndexSnapshot:
+        store = FAISS.from_embeddings(
+            zip([doc.page_content for doc in documents], embeddings),
+            self.embeddings(),
+            metadatas=[doc.metadata for doc in documents],
+        )
+        return self._from_langchain_store(store, index)
+
+    def commit(self, snapshot: Optional[IndexSnapshot]):
+        """Persist ``snapshot`` and make it the index served to readers."""
+        with self.write_lock:
+            if snapshot is None:
+                self.clear()
+                return
+            maybe_promote(snapshot.store, snapshot.vectors)
+            os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(dir=VECTOR_STORE_PATH, prefix=".tmp-")
+            try:
+                index_path, ids_path = self._index_files()
+                store = snapshot.store
+                faiss.write_index(
+                    store.index, os.path.join(tmp_dir, os.path.basename(index_path))
+                )
+                with open(os.path.join(tmp_dir, os.path.basename(ids_path)), "w") as f:
+                    json.dump(
+                        [
+                            store.index_to_docstore_id[i]
+                            for i in range(store.index.ntotal)
+                        ],
+                        f,
+                    )
+                sidecars = self._sidecar_files()
+                snapshot.documents.save(
+                    os.path.join(tmp_dir, os.path.basename(sidecars[0]))
+                )
+                if snapshot.vectors is not None:
+                    snapshot.vectors.save(
+                        os.path.join(tmp_dir, os.path.basename(self._vectors_path()))
+                    )
+                # 파일 단위 교체(os.replace)로 반쯤 쓰인 인덱스가 노출되지 않게 함
+                # 버전 스탬프 대상인 인덱스 파일을 마지막에 교체
+                with self._commit_lock():
+                    store.docstore.flush()
+                    if snapshot.vectors is not None:
+                        sidecars += (self._vectors_path(),)
+                    elif os.path.exists(self._vectors_path()):
+                        os.remove(self._vectors_path())
+                    for path in sidecars + tuple(reversed(self._index_files())):
+                        os.replace(os.path.join(tmp_dir, os.path.basename(path)), path)
+                    version = self._disk_version()
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._swap(snapshot, version)
+
+    def clear(self):
+        """Remove the on-disk index and drop the cached snapshot."""
+        with self.write_lock, self._commit_lock():
+            for path in (
+                self._index_files()
+                + self._sidecar_files()
+                + (
+                    self._vectors_path(),
+                    self._docstore_path(),
+                )
+            ):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._swap(None, None)
+
+    def _swap(self, snapshot: Optional[IndexSnapshot], version):
+        self._snapshot, self._version = snapshot, version
+        # 인덱스가 바뀌면 이전 버전의 검색 결과는 다시 쓰이지 않음
+        self.search_cache.clear()
+
+    def is_current(self, snapshot: Optional[IndexSnapshot]) -> bool:
+        return snapshot is self._snapshot
+
+    def positions(self, snapshot: IndexSnapshot) -> Dict[str, int]:
+        """Reverse of ``index_to_docstore_id`` for a served snapshot (cached)."""
+        cached_snapshot, positions = self._positions
+        if cached_snapshot is not snapshot:
+            positions = {
+                doc_id: position
+                for position, doc_id in snapshot.store.index_to_docstore_id.items()
+            }
+            self._positions = (snapshot, positions)
+        return positions
+
+
+vector_store_service = VectorStoreService()
 
-    if not documents:
-        return
 
-    # Text splitting
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        add_start_index=True,
+def get_vector_store() -> Optional[FAISS]:
+    """Return the shared vector store (loaded once per process)."""
+    snapshot = vector_store_service.snapshot()
+    return snapshot.store if snapshot else None
+
+
+def _index_pdfs(
+    snapshot: Optional[IndexSnapshot],
+    pdf_paths: List[str],
+    stats: IngestStats,
+    progress: Optional[ProgressCallback] = None,
+) -> Optional[IndexSnapshot]:
+    """Parse, embed and append ``pdf_paths`` to an editable snapshot.
+
+    Chunks that are near-duplicates of already indexed text are skipped
+    before embedding and recorded as links on the document's manifest entry.
+
+    Long documents are streamed page window by page window; every
+    ``INGEST_CHECKPOINT_PAGES`` pages the snapshot is committed with the
+    next page to read recorded on the document, so a failure part-way
+    through only loses the pages since the last checkpoint. Documents with
+    such a checkpoint continue from it when indexed again unchanged.
+    """
+    if progress:
+        progress("parsing", 0.0)
+    embeddings = vector_store_service.embeddings()
+    dedup = Deduplicator(
+        snapshot.documents if snapshot else DocumentIndex(), settings.DEDUP_THRESHOLD
     )
-    splits = text_splitter.split_documents(documents)
+    fingerprints = {}
+    start_pages = {}
+    if snapshot:
+        pdf_paths = list(pdf_paths)
+        for path in list(pdf_paths):
+            page = snapshot.documents.resume_page(path)
+            if page is None:
+                continue
+            if snapshot.documents.is_unchanged(path):
+                _truncate_document(snapshot, path, page)
+                start_pages[path] = page
+                fingerprints[path] = snapshot.documents.get(path)["file"]
+            else:
+                # 체크포인트 이후 파일이 바뀌었으면 처음부터 다시 색인
+                relinked = _remove_documents(snapshot, [path])
+                pdf_paths += [p for p in relinked if p not in pdf_paths]
+
+    checkpoint_at = stats.pages + settings.INGEST_CHECKPOINT_PAGES
+    for batch in iter_chunk_batches(
+        pdf_paths,
+        stats,
+        # 임베딩 스케줄러가 EMBED_CONCURRENCY개 요청을 동시에 보낼 만큼씩 전달
+        batch_size=embedding_batch_size(
+            settings.EMBED_BATCH_TOKENS,
+            settings.EMBED_MAX_BATCH_SIZE,
+            settings.EMBED_CONCURRENCY,
+        ),
+        backend=settings.PDF_LOADER,
+        cached=settings.PDF_TEXT_CACHE,
+        start_pages=start_pages,
+    ):
+        if progress:
+            progress("embedding", stats.files / max(len(pdf_paths), 1))
+        splits, signatures = batch.chunks, []
+        if settings.DEDUP_ENABLED and splits:
+            splits, signatures = dedup.filter(
+                splits, snapshot.store.docstore if snapshot else None
+            )
 
-    vector_store = get_vector_store()
+        if splits:
+            # 원본 벡터를 사이드카에도 남기기 위해 임베딩을 직접 계산
+            vectors = embeddings.embed_documents([doc.page_content for doc in splits])
+            if snapshot:
+                ids = snapshot.store.add_embeddings(
+                    zip([doc.page_content for doc in splits], vectors),
+                    metadatas=[doc.metadata for doc in splits],
+                )
+                for doc_id, doc in zip(ids, splits):
+                    snapshot.documents.add(doc_id, doc)
+                if snapshot.vectors is not None:
+                    snapshot.vectors.append(np.array(vectors, dtype="float32"))
+            else:
+                snapshot = vector_store_service.new_snapshot(
+                    splits, vectors, dedup.documents
+                )
+                ids = [
+                    snapshot.store.index_to_docstore_id[i] for i in range(len(splits))
+                ]
+            if signatures:
+                dedup.register(ids, signatures, snapshot.store.docstore)
+
+        if snapshot is None:
+            continue
+        partial = False
+        for path, page in batch.checkpoints.items():
+            if path not in snapshot.documents:
+                continue
+            if path not in fingerprints:
+                fingerprints[path] = file_fingerprint(path)
+            snapshot.documents.set_file(path, fingerprints[path])
+            snapshot.documents.set_resume_page(path, page)
+            partial = partial or page is not None
+        if partial and stats.pages >= checkpoint_at:
+            # 지금까지 색인한 페이지를 커밋하고 새 복사본에서 계속
+            vector_store_service.commit(snapshot)
+            snapshot = vector_store_service.editable()
+            dedup.documents = snapshot.documents
+            checkpoint_at = stats.pages + settings.INGEST_CHECKPOINT_PAGES
+            print(f"Checkpoint: {stats.pages} pages, {stats.chunks} chunks")
+
+    stats.duplicates += dedup.skipped
+    if snapshot:
+        for path in pdf_paths:
+            if path in snapshot.documents:
+                snapshot.documents.set_file(
+                    path, fingerprints.get(path) or file_fingerprint(path)
+                )
+        for message in snapshot.documents.mark_duplicate_documents(
+            pdf_paths, settings.DEDUP_DOCUMENT_RATIO
+        ):
+            print(message)
+    return snapshot
+
+
+def _truncate_document(snapshot: IndexSnapshot, path: str, page: int):
+    """Drop a document's chunks from ``page`` on before resuming from there.
+
+    A checkpoint only covers whole page windows, but the batch it was
+    committed with may already hold chunks of the following pages.
+    """
+    ids = snapshot.documents.ids(path)
+    docs = snapshot.store.docstore.mget(ids)
+    stale = [
+        doc_id
+        for doc_id, doc in zip(ids, docs)
+        if doc is not None and doc.metadata.get("page", 0) >= page
+    ]
+    if stale:
+        snapshot.documents.truncate(path, stale, page)
+        remove_ids(snapshot.store, stale, snapshot.vectors)
+
+
+def _remove_documents(snapshot: IndexSnapshot, filenames: List[str]) -> List[str]:
+    """Remove ``filenames`` and every document linking to their chunks.
+
+    Documents whose duplicate chunks pointed at a removed document lose
+    their only copy of that text, so they are removed as well; their paths
+    are returned so the caller can re-index them.
+    """
+    dependents = snapshot.documents.dependents(filenames)
+    reindex = []
+    ids_to_delete = []
+    for filename in list(filenames) + dependents:
+        entry = snapshot.documents.remove(filename)
+        if entry:
+            ids_to_delete.extend(entry["ids"])
+            if filename in dependents and os.path.exists(entry["source"]):
+                reindex.append(entry["source"])
+    if ids_to_delete:
+        remove_ids(snapshot.store, ids_to_delete, snapshot.vectors)
+    return reindex
+
+
+def add_pdfs_to_vector_store(
+    pdf_paths: List[str], progress: Optional[ProgressCallback] = None
+) -> Optional[IngestStats]:
+    """Add new PDFs to the persistent vector store.
+
+    PDFs are parsed and chunked in a process pool and the chunks are
+    embedded and appended to the index batch by batch. ``progress`` is called
+    with a stage name and a 0..1 fraction. Returns the ingestion stats, or
+    None if the index could not be updated.
+    """
+    if not pdf_paths:
+        return None
+
+    stats = IngestStats()
+
+    with vector_store_service.write_lock:
+        stats_before = vector_store_service.embedding_stats()
 
-    if vector_store:
-        vector_store.add_documents(splits)
-    else:
         try:
-            vector_store = FAISS.from_documents(splits, get_embeddings())
+            snapshot = _index_pdfs(
+                vector_store_service.editable(), pdf_paths, stats, progress
+            )
         except Exception as e:
             print(f"Error creating new vector store: {e}")
-            return
+            return None
 
-    try:
-        vector_store.save_local(VECTOR_STORE_PATH, index_name=INDEX_NAME)
-    except Exception as e:
-        print(f"Error saving vector store: {e}")
+        print(stats.report())
+        if not stats.chunks:
+            return stats
 
+        try:
+            vector_store_service.commit(snapshot)
+        except Exception as e:
+            print(f"Error saving vector store: {e}")
+            return None
 
-def rebuild_index():
-    """Rebuild the entire index from the raw data directory.
-    Useful when files are deleted or checking consistency.
+        stats_after = vector_store_service.embedding_stats()
+        print(
+            f"Embedding cache: {stats_after['hits'] - stats_before['hits']} hits, "
+            f"{stats_after['misses'] - stats_before['misses']} misses"
+        )
+    return stats
+
+
+def rebuild_index(progress: Optional[ProgressCallback] = None) -> bool:
+    """Bring the index in line with the raw data directory.
+
+    Uses the manifest stored next to the index to add new PDFs, drop deleted
+    ones and re-index modified ones only. The current index keeps serving
+    readers until the updated one is committed. Returns False if indexing or
+    saving failed.
     """
     if not os.path.exists(RAW_DATA_PATH):
-        return
+        return True
 
-    # Clear existing vector store
-    if os.path.exists(VECTOR_STORE_PATH):
+    pdf_files = {
+        f: os.path.join(RAW_DATA_PATH, f)
+        for f in os.listdir(RAW_DATA_PATH)
+        if f.lower().endswith(".pdf")
+    }
+
+    with vector_store_service.write_lock:
+        snapshot = vector_store_service.editable()
+        indexed = set(snapshot.documents.filenames()) if snapshot else set()
+
+        deleted = [name for name in indexed if name not in pdf_files]
+        modified = [
+            name
+            for name in indexed & pdf_files.keys()
+            if not snapshot.documents.is_unchanged(pdf_files[name])
+        ]
+        added = [name for name in pdf_files if name not in indexed]
+        # 체크포인트까지만 색인된 문서는 남은 페이지부터 이어서 색인
+        resumed = [
+            name
+            for name in indexed & pdf_files.keys()
+            if name not in modified
+            and snapshot.documents.resume_page(pdf_files[name]) is not None
+        ]
+        print(
+            f"Rebuild: {len(added)} new, {len(modified)} modified, "
+            f"{len(deleted)} deleted, {len(resumed)} resumed, "
+            f"{len(indexed) - len(deleted) - len(modified) - len(resumed)} unchanged"
+        )
+
+        if not (deleted or modified or added or resumed):
+            return True
+
+        stats = IngestStats()
+        paths = [pdf_files[name] for name in modified + added + resumed]
         try:
-            shutil.rmtree(VECTOR_STORE_PATH)
-            os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
+            if snapshot:
+                # 삭제/변경된 문서를 원본으로 링크하던 중복 문서도 다시 색인
+                relinked = _remove_documents(snapshot, deleted + modified)
+                paths += [path for path in relinked if path not in paths]
+            snapshot = _index_pdfs(snapshot, paths, stats, progress)
         except Exception as e:
-            print(f"Error clearing vector store directory: {e}")
+            print(f"Error rebuilding index: {e}")
+            return False
+        print(stats.report())
 
-    pdf_files = [
-        os.path.join(RAW_DATA_PATH, f)
-        for f in os.listdir(RAW_DATA_PATH)
-        if f.lower().endswith(".pdf")
-    ]
+        try:
+            if snapshot is None or not len(snapshot.documents):
+                vector_store_service.clear()
+            else:
+                vector_store_service.commit(snapshot)
+        except Exception as e:
+            print(f"Error saving vector store: {e}")
+            return False
+        return True
 
-    if pdf_files:
-        add_pdfs_to_vector_store(pdf_files)
 
+def delete_document_from_vector_store(filename: str) -> bool:
+    """Delete a specific document from the vector store by filename.
 
-def delete_document_from_vector_store(filename: str):
-    """Delete a specific document from the vector store by filename."""
-    vector_store = get_vector_store()
-    if not vector_store:
-        return
+    Returns False if the updated index could not be built or saved.
+    """
+    with vector_store_service.write_lock:
+        snapshot = vector_store_service.editable()
+        if not snapshot:
+            return True
 
-    # In LangChain FAISS, docstore stores documents with IDs.
-    # index_to_docstore_id maps index ID to docstore ID.
-    # We need to find ids where metadata source matches.
+        if filename not in snapshot.documents:
+            print(f"No documents found for {filename}")
+            return True
 
-    ids_to_delete = []
+        try:
+            # 사이드 인덱스에서 해당 파일의 docstore ID를 바로 조회
+            deleted = snapshot.documents.get(filename)["chunks"]
+            relinked = _remove_documents(snapshot, [filename])
+            if relinked:
+                # 이 문서의 청크를 공유하던 중복 문서는 자체 청크로 다시 색인
+                snapshot = _index_pdfs(snapshot, relinked, IngestStats())
+            if snapshot is None or not len(snapshot.documents):
+                vector_store_service.clear()
+            else:
+                vector_store_service.commit(snapshot)
+            print(f"Deleted {deleted} chunks for {filename}")
+        except Exception as e:
+            print(f"Error deleting document {filename}: {e}")
+            return False
+        return True
 
-    # helper to check if source matches
-    # source in metadata might be absolute path or just filename depending on how we saved it.
-    # We should handle both cases or ensure we pass what matches.
 
-    for doc_id, doc in vector_store.docstore._dict.items():
-        source = doc.metadata.get("source", "")
-        # Check if source matches filename or ends with filename
-        if source == filename or source.endswith(f"/{filename}"):
-            ids_to_delete.append(doc_id)
+def rename_document_in_vector_store(old_path: str, new_path: str) -> bool:
+    """Rename a document by rewriting the source metadata of its chunks.
 
-    if not ids_to_delete:
-        print(f"No documents found for {filename}")
-        return
+    The text of a renamed PDF does not change, so the existing chunks and
+    vectors are kept as-is; no PDF parsing or embedding calls are made.
+    Returns False if the renamed index could not be saved.
+    """
+    old_filename = os.path.basename(old_path)
 
-    try:
-        vector_store.delete(ids_to_delete)
-        vector_store.save_local(VECTOR_STORE_PATH, index_name=INDEX_NAME)
-        print(f"Deleted {len(ids_to_delete)} chunks for {filename}")
-    except Exception as e:
-        print(f"Error deleting document {filename}: {e}")
+    with vector_store_service.write_lock:
+        snapshot = vector_store_service.editable()
+        entry = snapshot.documents.rename(old_filename, new_path) if snapshot else None
 
+        if not entry:
+            # 색인되지 않았던 파일이면 새로 추가
+            if os.path.exists(new_path):
+                return add_pdfs_to_vector_store([new_path]) is not None
+            return True
+
+        try:
+            docstore = snapshot.store.docstore
+            docstore.update(
+                {
+                    doc_id: Document(
+                        id=doc_id,
+                        page_content=doc.page_content,
+                        metadata={**doc.metadata, "source": new_path},
+                    )
+                    for doc_id, doc in zip(entry["ids"], docstore.mget(entry["ids"]))
+                    if doc is not None
+                }
+            )
+            vector_store_service.commit(snapshot)
+            print(f"Renamed {entry['chunks']} chunks from {old_filename} to {new_path}")
+        except Exception as e:
+            print(f"Error renaming document {old_filename}: {e}")
+            return False
+        return True
+
+
+def get_document_chunks(filename: str) -> List[Document]:
+    """Return the indexed chunks of one PDF, in insertion order."""
+    snapshot = vector_store_service.snapshot()
+    if not snapshot:
+        return []
+
+    docs = snapshot.store.docstore.mget(snapshot.documents.ids(filename))
+    return [doc for doc in docs if doc is not None]
 
-def rename_document_in_vector_store(old_path: str, new_path: str):
-    """Rename a document by deleting the old one and adding the new one."""
-    # 1. Delete old chunks
-    old_filename = os.path.basename(old_path)
-    delete_document_from_vector_store(old_filename)
 
-    # 2. Add new file
-    if os.path.exists(new_path):
-        add_pdfs_to_vector_store([new_path])
+def list_indexed_documents() -> Dict[str, Dict[str, Any]]:
+    """Return per-document chunk counts and page ranges keyed by filename."""
+    snapshot = vector_store_service.snapshot()
+    if not snapshot:
+        return {}
 
+    return {
+        name: {
+            "source": entry["source"],
+            "chunks": entry["chunks"],
+            "pages": entry["pages"],
+            "duplicate_of": entry.get("duplicate_of"),
+            "resume_page": entry.get("resume_page"),
+            "sha256": entry.get("file", {}).get("sha256"),
+        }
+        for name, entry in snapshot.documents.entries.items()
+    }
 
-def search_pdfs(query: str, k: int = 5) -> List[Dict[str, Any]]:
-    """Search within the persistent vector store."""
-    vector_store = get_vector_store()
-    if not vector_store:
+
+class SearchScope(NamedTuple):
+    """문서 필터를 FAISS 위치와 docstore source 경로로 풀어 둔 것
+
+    중복으로 건너뛴 청크는 원본 문서의 청크로 대신 검색하고, 그 청크는
+    선택한 문서의 경로로 표시합니다 (aliases: 청크 ID -> 표시할 source).
+    """
+
+    sources: List[str]
+    positions: np.ndarray
+    aliases: Dict[str, str]
+
+
+def _linked_aliases(
+    snapshot: IndexSnapshot, filenames: List[str], own: set
+) -> Dict[str, str]:
+    """Stand-in chunks for the skipped duplicates of ``filenames``.
+
+    Maps the ID of each linked original chunk that is not already in
+    ``own`` to the source path of the document it stands in for.
+    """
+    aliases: Dict[str, str] = {}
+    for filename in filenames:
+        entry = snapshot.documents.get(filename)
+        if not entry:
+            continue
+        for doc_id in snapshot.documents.linked_ids(filename):
+            if doc_id not in own:
+                aliases.setdefault(doc_id, entry["source"])
+    return aliases
+
+
+def _show_as(docs: List[Document], aliases: Dict[str, str]) -> List[Document]:
+    """Label stand-in chunks with the source of the document they stand in for."""
+    return [
+        (
+            Document(
+                id=doc.id,
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "source": aliases[doc.id]},
+            )
+            if doc.id in aliases
+            else doc
+        )
+        for doc in docs
+    ]
+
+
+def _resolve_scope(
+    snapshot: IndexSnapshot, documents: Optional[List[str]]
+) -> Optional[SearchScope]:
+    if not documents:
+        return None
+    positions = vector_store_service.positions(snapshot)
+    sources, own = [], set()
+    for filename in documents:
+        entry = snapshot.documents.get(filename)
+        if entry:
+            sources.append(entry["source"])
+            own.update(entry["ids"])
+    # 원본 문서가 삭제/재색인 중이면 링크된 청크가 인덱스에 없을 수 있음
+    aliases = {
+        doc_id: source
+        for doc_id, source in _linked_aliases(snapshot, documents, own).items()
+        if doc_id in positions
+    }
+    selected = [positions[doc_id] for doc_id in own] + [
+        positions[doc_id] for doc_id in aliases
+    ]
+    return SearchScope(sources, np.array(sorted(selected), dtype="int64"), aliases)
+
+
+def _lexical_ids(
+    store: FAISS, query: str, k: int, scope: Optional[SearchScope] = None
+) -> List[str]:
+    return [
+        doc_id
+        for doc_id, _ in store.docstore.search_lexical(
+            fts_query(query),
+            k,
+            sources=scope.sources if scope else None,
+            ids=list(scope.aliases) if scope else None,
+        )
+    ]
+
+
+def _vector_ids(
+    snapshot: IndexSnapshot, query: str, k: int, scope: Optional[SearchScope] = None
+) -> List[str]:
+    store = snapshot.store
+    if not store.index.ntotal:
         return []
+
+    # 압축된 인덱스는 후보를 넉넉히 뽑아 원본 벡터로 다시 정렬
+    reranking = (
+        snapshot.vectors is not None
+        and settings.VECTOR_RERANK_FACTOR > 1
+        and compression_of(store.index) != Compression.NONE
+    )
+    fetch = k * settings.VECTOR_RERANK_FACTOR if reranking else k
+
+    vector = np.array([store.embedding_function.embed_query(query)], dtype="float32")
+    if scope is None:
+        _, labels = store.index.search(vector, min(fetch, store.index.ntotal))
+    else:
+        _, labels = filtered_search(store.index, vector, fetch, scope.positions)
+    positions = [int(i) for i in labels[0] if i != -1]
+    if reranking:
+        positions = rerank(
+            vector[0], positions, snapshot.vectors, k, store.index.metric_type
+        )
+    return [store.index_to_docstore_id[i] for i in positions[:k]]
+
+
+def _search_ids(
+    snapshot: IndexSnapshot,
+    query: str,
+    k: int,
+    mode: str,
+    scope: Optional[SearchScope] = None,
+) -> List[str]:
+    store = snapshot.store
+    if mode == RetrievalMode.AUTO:
+        # 정확한 용어 질의는 임베딩 호출 없이 BM25로 처리, 결과가 없으면 hybrid
+        if is_lexical_query(query):
+            ids = _lexical_ids(store, query, k, scope)
+            if ids:
+                return ids
+        mode = RetrievalMode.HYBRID
+
+    if mode == RetrievalMode.LEXICAL:
+        return _lexical_ids(store, query, k, scope)
+    if mode == RetrievalMode.VECTOR:
+        return _vector_ids(snapshot, query, k, scope)
+    if mode == RetrievalMode.HYBRID:
+        candidates = max(k * 4, settings.RETRIEVAL_CANDIDATES)
+        return reciprocal_rank_fusion(
+            [
+                _vector_ids(snapshot, query, candidates, scope),
+                _lexical_ids(store, query, candidates, scope),
+            ]
+        )[:k]
+    raise ValueError(f"Invalid RETRIEVAL_MODE: {mode}")
+
+
+def search_pdfs(
+    query: str,
+    k: int = 5,
+    mode: Optional[str] = None,
+    documents: Optional[List[str]] = None,
+) -> List[Document]:
+    """Search within the persistent index.
+
+    ``mode`` (default ``settings.RETRIEVAL_MODE``) selects BM25 only
+    (``lexical``), embeddings only (``vector``), reciprocal-rank fusion of
+    both (``hybrid``), or ``auto``, which answers exact-term queries from the
+    BM25 index without an embedding call and falls back to hybrid otherwise.
+    ``documents`` restricts the search to the given PDF filenames; the
+    restriction is applied inside FAISS and the BM25 query, not by
+    post-filtering. Results are cached per index version.
+    """
+    snapshot = vector_store_service.snapshot()
+    if not snapshot:
+        return []
+    vector_store = snapshot.store
+    mode = mode or settings.RETRIEVAL_MODE
+    documents = sorted(set(documents)) if documents else None
+
     try:
-        return vector_store.similarity_search(query, k=k)
+        # 같은 질의가 반복되면 임베딩 호출과 FAISS 검색을 모두 건너뜀
+        key = (
+            normalize_query(query),
+            k,
+            mode,
+            tuple(documents or ()),
+            vector_store_service.version,
+        )
+        cached = vector_store_service.search_cache.get(key)
+        if cached is None:
+            scope = _resolve_scope(snapshot, documents)
+            if scope is not None and not len(scope.positions):
+                return []
+            ids = _search_ids(snapshot, query, k, mode, scope)
+            cached = (ids, scope.aliases if scope else {})
+            if vector_store_service.is_current(snapshot):
+                vector_store_service.search_cache.put(key, cached)
+        ids, aliases = cached
+        docs = vector_store.docstore.mget(ids)
+        return _show_as([doc for doc in docs if doc is not None], aliases)
     except Exception as e:
         print(f"Search error: {str(e)}")
         return []
 
 
-def get_all_documents() -> List[Document]:
-    """Retrieve all documents from the vector store."""
-    vector_store = get_vector_store()
-    if not vector_store:
+def get_all_documents(documents: Optional[List[str]] = None) -> List[Document]:
+    """Retrieve all documents from the vector store, grouped by PDF.
+
+    ``documents`` limits the result to the given PDF filenames. Chunks a
+    selected PDF skipped as near-duplicates are filled in from the original
+    document, in page order and labelled with the selected PDF's source.
+    """
+    snapshot = vector_store_service.snapshot()
+    if not snapshot:
         return []
 
-    return list(vector_store.docstore._dict.values())
+    docstore = snapshot.store.docstore
+    filenames = documents or snapshot.documents.filenames()
+    own = {doc_id for name in filenames for doc_id in snapshot.documents.ids(name)}
+    result = []
+    for filename in filenames:
+        aliases = _linked_aliases(snapshot, [filename], own)
+        own.update(aliases)
+        ids = snapshot.documents.ids(filename) + list(aliases)
+        docs = [doc for doc in docstore.mget(ids) if doc is not None]
+        if aliases:
+            docs = _show_as(docs, aliases)
+            docs.sort(
+                key=lambda doc: (
+                    doc.metadata.get("page", 0),
+                    doc.metadata.get("start_index", 0),
+                )
+            )
+        result.extend(docs)
+    return result
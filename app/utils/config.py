@@ -1,3 +1,7 @@
+import atexit
+from functools import lru_cache
+
+import httpx
 from dotenv import load_dotenv
 from langchain_openai import (
     AzureChatOpenAI,
@@ -6,6 +10,8 @@ from langchain_openai import (
     OpenAIEmbeddings,
 )
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from utils.embeddings import FakeEmbeddings, ScheduledEmbeddings
+from utils.http_clients import HttpClients
 
 load_dotenv()
 
@@ -25,6 +31,83 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-5-nano"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
 
+    # 임베딩 스케줄러 설정 ("fake" 백엔드는 오프라인 벤치마크용)
+    EMBEDDING_BACKEND: str = "openai"
+    FAKE_EMBEDDING_DIM: int = 256
+    EMBED_BATCH_TOKENS: int = 50_000
+    EMBED_MAX_BATCH_SIZE: int = 512
+    EMBED_CONCURRENCY: int = 4
+    EMBED_REQUESTS_PER_MINUTE: int = 3_000
+    EMBED_TOKENS_PER_MINUTE: int = 1_000_000
+    EMBED_MAX_RETRIES: int = 6
+
+    # 벡터 인덱스 설정: flat | hnsw | ivf_flat | ivf_pq
+    # flat 외 타입은 청크 수가 VECTOR_INDEX_PROMOTE_AT 이상이 되면 자동 전환
+    VECTOR_INDEX_TYPE: str = "flat"
+    VECTOR_INDEX_PROMOTE_AT: int = 20_000
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 80
+    HNSW_EF_SEARCH: int = 64
+    IVF_NLIST: int = 0  # 0이면 코퍼스 크기로 자동 결정
+    IVF_NPROBE: int = 16
+    PQ_M: int = 0  # 0이면 임베딩 차원으로 자동 결정
+    # 벡터 압축: none | fp16 | int8 | pq (원본 float32는 디스크 사이드카에 보관)
+    # 압축 시 상위 k * VECTOR_RERANK_FACTOR 후보를 원본 벡터로 재정렬 (1 이하면 끔)
+    VECTOR_COMPRESSION: str = "none"
+    VECTOR_RERANK_FACTOR: int = 4
+    # 색인 시 MinHash로 거의 같은 청크는 임베딩하지 않고 원본 문서에 링크
+    # 청크의 DEDUP_DOCUMENT_RATIO 이상이 한 문서의 중복이면 문서 자체를 중복으로 표시
+    DEDUP_ENABLED: bool = True
+    DEDUP_THRESHOLD: float = 0.85
+    DEDUP_DOCUMENT_RATIO: float = 0.9
+    # 문서 필터 검색 시 HNSW에서 선택된 청크가 이 수 이하이면 정확 검색
+    FILTER_EXACT_SEARCH_MAX: int = 4096
+
+    # PDF 텍스트 추출 백엔드: pypdf | pymupdf (pymupdf 미설치 시 pypdf 사용)
+    # 추출한 페이지 텍스트는 내용 해시 기준으로 캐시해 재색인/재업로드 시 재사용
+    PDF_LOADER: str = "pypdf"
+    PDF_TEXT_CACHE: bool = True
+    # 긴 PDF를 스트리밍 색인할 때 이 페이지 수마다 체크포인트 커밋 (실패 시 이어서 색인)
+    INGEST_CHECKPOINT_PAGES: int = 128
+
+    # 검색 모드: auto | hybrid | vector | lexical
+    # auto는 정확한 용어 위주의 짧은 질의를 BM25만으로 처리하고 나머지는 hybrid
+    RETRIEVAL_MODE: str = "auto"
+    RETRIEVAL_CANDIDATES: int = 20  # 융합 전 각 검색기에서 가져올 최소 후보 수
+
+    # 질의 캐시: 질의 임베딩 / 검색 결과(청크 ID) LRU 크기, 0이면 사용 안 함
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024
+    QUERY_EMBEDDING_PERSIST: bool = True  # 질의 임베딩을 디스크 캐시에도 저장
+    SEARCH_RESULT_CACHE_SIZE: int = 1024
+
+    # 프롬프트 토큰 예산 (모델 토크나이저 기준)
+    # 검색/요약 컨텍스트는 관련도 순으로 CONTEXT_TOKEN_BUDGET까지 채우고
+    # 대화 기록은 최근 메시지부터 HISTORY_TOKEN_BUDGET까지만 포함
+    CONTEXT_TOKEN_BUDGET: int = 12_000
+    HISTORY_TOKEN_BUDGET: int = 4_000
+
+    # 요약: 전체 청크가 CONTEXT_TOKEN_BUDGET을 넘으면 문서별 map-reduce 요약
+    # map 호출 하나에 넣는 최대 글자 수와 동시에 실행할 LLM 호출 수
+    SUMMARY_MAP_CHARS: int = 12_000
+    SUMMARY_MAP_CONCURRENCY: int = 4
+    # 색인된 PDF의 문서/구간 요약을 백그라운드에서 미리 생성 (내용 해시 기준 저장)
+    SUMMARY_PRECOMPUTE: bool = True
+
+    # MCP 서버(arXiv 검색, Exa 웹 검색) 세션 풀: 서버별로 열어 둘 세션 수,
+    # 상태 확인 주기(초), HTTP 서버의 도구 목록 갱신 주기(초)
+    MCP_POOL_SIZE: int = 2
+    MCP_PING_INTERVAL: float = 30.0
+    MCP_TOOLS_TTL: float = 300.0
+
+    # LLM/임베딩 API 호출이 함께 쓰는 HTTP 커넥션 풀 (keep-alive, 가능하면 HTTP/2)
+    # 연결 한도, 유휴 연결 유지 시간(초), 연결/응답 타임아웃(초)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_TIMEOUT: float = 600.0
+    HTTP2: bool = True
+
     LANGFUSE_SECRET_KEY: str
     LANGFUSE_PUBLIC_KEY: str
     LANGFUSE_BASE_URL: str
@@ -38,6 +121,8 @@ class Settings(BaseSettings):
         if self.MODE == "HOME":
             return ChatOpenAI(
                 model=self.OPENAI_MODEL,
+                http_client=http_clients.sync,
+                http_async_client=http_clients.async_,
             )
         elif self.MODE == "WORK":
             return AzureChatOpenAI(
@@ -47,32 +132,110 @@ class Settings(BaseSettings):
                 api_version="2024-08-01-preview",
                 temperature=0.7,
                 streaming=True,
+                http_client=http_clients.sync,
+                http_async_client=http_clients.async_,
             )
         else:
             raise ValueError("Invalid MODE")
 
     def get_embeddings(self):
+        return ScheduledEmbeddings(
+            self._get_embeddings_backend(),
+            batch_tokens=self.EMBED_BATCH_TOKENS,
+            max_batch_size=self.EMBED_MAX_BATCH_SIZE,
+            concurrency=self.EMBED_CONCURRENCY,
+            requests_per_minute=self.EMBED_REQUESTS_PER_MINUTE,
+            tokens_per_minute=self.EMBED_TOKENS_PER_MINUTE,
+            max_retries=self.EMBED_MAX_RETRIES,
+        )
+
+    def _get_embeddings_backend(self):
+        if self.EMBEDDING_BACKEND == "fake":
+            return FakeEmbeddings(size=self.FAKE_EMBEDDING_DIM)
         # update HOME
+        # 재시도는 ScheduledEmbeddings가 담당하므로 클라이언트 재시도는 끔
         if self.MODE == "HOME":
             return OpenAIEmbeddings(
                 model=self.OPENAI_EMBEDDING_MODEL,
+                max_retries=0,
+                http_client=http_clients.sync,
+                http_async_client=http_clients.async_,
             )
         elif self.MODE == "WORK":
             return AzureOpenAIEmbeddings(
                 model=self.AOAI_DEPLOY_EMBED_3_LARGE,
                 api_key=self.AOAI_API_KEY,
                 azure_endpoint=self.AOAI_ENDPOINT,
+                max_retries=0,
+                http_client=http_clients.sync,
+                http_async_client=http_clients.async_,
             )
         else:
             raise ValueError("Invalid MODE")
 
+    def get_llm_model_name(self) -> str:
+        # 미리 만든 문서 요약의 캐시 키에 사용되는 모델 식별자
+        if self.MODE == "HOME":
+            return self.OPENAI_MODEL
+        elif self.MODE == "WORK":
+            return self.AOAI_DEPLOY_GPT4O
+        else:
+            raise ValueError("Invalid MODE")
+
+    def get_embedding_model_name(self) -> str:
+        # 임베딩 캐시 키에 사용되는 모델 식별자
+        if self.EMBEDDING_BACKEND == "fake":
+            return f"fake-{self.FAKE_EMBEDDING_DIM}"
+        if self.MODE == "HOME":
+            return self.OPENAI_EMBEDDING_MODEL
+        elif self.MODE == "WORK":
+            return self.AOAI_DEPLOY_EMBED_3_LARGE
+        else:
+            raise ValueError("Invalid MODE")
+
 
 settings = Settings()
 
+http_clients = HttpClients(
+    limits=httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    ),
+    timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+    http2=settings.HTTP2,
+)
+
 
+# 모델 객체는 프로세스에서 하나만 만들어 공유 커넥션 풀을 재사용
+@lru_cache(maxsize=1)
 def get_llm():
     return settings.get_llm()
 
 
+@lru_cache(maxsize=1)
 def get_embeddings():
     return settings.get_embeddings()
+
+
+def get_http_stats():
+    """Requests sent and connections opened by the shared LLM/embedding clients."""
+    return http_clients.stats.snapshot()
+
+
+def close_clients():
+    """Close the shared HTTP connections; models are rebuilt on next use."""
+    get_llm.cache_clear()
+    get_embeddings.cache_clear()
+    http_clients.close()
+
+
+atexit.register(close_clients)
+
+
+def get_embedding_model_name():
+    return settings.get_embedding_model_name()
+
+
+def get_llm_model_name():
+    return settings.get_llm_model_name()
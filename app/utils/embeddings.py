@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class FakeEmbeddings(Embeddings):
+    """오프라인 벤치마크용 로컬 임베딩 백엔드
+
+    텍스트 해시로 결정적인 단위 벡터를 만들고, ``latency`` 만큼 요청 지연을
+    흉내 내어 실제 API 없이 스케줄러 처리량을 측정할 수 있게 합니다.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.size)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+
+class RateLimiter:
+    """분당 요청 수 / 토큰 수 제한 (이벤트 루프에 묶이지 않는 토큰 버킷)"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._lock = threading.Lock()
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        self._updated = now
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve capacity for one request and return how long to wait."""
+        # 한 요청이 버킷 크기를 넘으면 영원히 기다리지 않도록 잘라서 계산
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._requests -= 1
+            self._tokens -= tokens
+            wait_requests = -self._requests * 60 / self.rpm if self._requests < 0 else 0
+            wait_tokens = -self._tokens * 60 / self.tpm if self._tokens < 0 else 0
+            return max(wait_requests, wait_tokens)
+
+    async def acquire(self, tokens: int):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # 타임아웃/연결 오류 (openai.APITimeoutError, APIConnectionError 등)
+    return type(error).__name__ in (
+        "APITimeoutError",
+        "APIConnectionError",
+        "TimeoutError",
+    )
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Batching, concurrent, rate-limit-aware front end for an embeddings backend.
+
+    Texts are grouped into batches under a token budget, batches run
+    concurrently under RPM/TPM limits, and 429/5xx responses are retried
+    with exponential backoff (honouring ``Retry-After``).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_tokens: int = 50_000,
+        max_batch_size: int = 512,
+        concurrency: int = 4,
+        requests_per_minute: int = 3_000,
+        tokens_per_minute: int = 1_000_000,
+        max_retries: int = 6,
+        encoding_name: str = "cl100k_base",
+    ):
+        self.embeddings = embeddings
+        self.batch_tokens = batch_tokens
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._encoding_name = encoding_name
+        self._encoding = None
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is None and tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(self._encoding_name)
+            except Exception:
+                # 인코딩 파일을 받을 수 없는 환경이면 근사치 사용
+                self._encoding = False
+        if self._encoding:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, len(text) // 4)
+
+    def make_batches(self, texts: List[str]) -> List[Tuple[int, List[str], int]]:
+        """Split ``texts`` into (offset, texts, token_count) batches."""
+        batches = []
+        start, tokens = 0, 0
+        for i, text in enumerate(texts):
+            count = self.count_tokens(text)
+            size = i - start
+            if size and (
+                tokens + count > self.batch_tokens or size >= self.max_batch_size
+            ):
+                batches.append((start, texts[start:i], tokens))
+                start, tokens = i, 0
+            tokens += count
+        if start < len(texts):
+            batches.append((start, texts[start:], tokens))
+        return batches
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Delay before retrying a failed request; re-raises final errors."""
+        if attempt == self.max_retries or not _is_retryable(error):
+            raise error
+        delay = _retry_after(error) or min(60.0, 2**attempt) * (0.5 + random.random())
+        print(f"Embedding request failed ({error}); retrying in {delay:.1f}s")
+        return delay
+
+    async def _embed_batch(self, texts: List[str], tokens: int) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(tokens)
+            try:
+                return await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        async def run(offset: int, batch: List[str], tokens: int):
+            async with semaphore:
+                vectors = await self._embed_batch(batch, tokens)
+            results[offset : offset + len(batch)] = vectors
+
+        await asyncio.gather(
+            *(
+                run(offset, batch, tokens)
+                for offset, batch, tokens in self.make_batches(texts)
+            )
+        )
+        return results
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aembed_documents(texts))
+
+        # 이미 이벤트 루프가 돌고 있는 스레드에서 호출되면 별도 스레드에서 실행
+        result = {}
+
+        def target():
+            try:
+                result["value"] = asyncio.run(self.aembed_documents(texts))
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+    # 질의 임베딩도 문서 배치와 같은 속도 제한과 재시도를 거침 (클라이언트 재시도는 꺼져 있음)
+    def embed_query(self, text: str) -> List[float]:
+        tokens = self.count_tokens(text)
+        for attempt in range(self.max_retries + 1):
+            wait = self.limiter.reserve(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return self.embeddings.embed_query(text)
+            except Exception as e:
+                time.sleep(self._backoff(attempt, e))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        tokens = self.count_tokens(text)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(tokens)
+            try:
+                return await self.embeddings.aembed_query(text)
+            except Exception as e:
+                await asyncio.sleep(self._backoff(attempt, e))
+
+
+if __name__ == "__main__":
+    # 오프라인 처리량 벤치마크: python app/utils/embeddings.py
+    texts = [f"chunk {i} " + "lorem ipsum dolor sit amet " * 40 for i in range(4_000)]
+
+    for concurrency in (1, 2, 4, 8):
+        backend = FakeEmbeddings(size=256, latency=0.05)
+        scheduler = ScheduledEmbeddings(
+            backend,
+            batch_tokens=20_000,
+            concurrency=concurrency,
+            requests_per_minute=100_000,
+            tokens_per_minute=100_000_000,
+        )
+        started = time.perf_counter()
+        vectors = scheduler.embed_documents(texts)
+        elapsed = time.perf_counter() - started
+        assert len(vectors) == len(texts)
+        print(
+            f"concurrency={concurrency}: {len(texts) / elapsed:,.0f} texts/s, "
+            f"{backend.calls} requests, {elapsed:.2f}s"
+        )
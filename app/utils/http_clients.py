@@ -0,0 +1,242 @@
+import asyncio
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import h2  # HTTP/2 지원 (pip install httpx[http2])
+except ImportError:
+    h2 = None
+
+# 요청 헤더 전송 시작 이벤트 (httpcore trace 이름: <프로토콜>.<단계>.<상태>)
+_REQUEST_EVENTS = (
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+class ConnectionStats:
+    """httpcore trace 이벤트로 집계한 요청 수와 새로 연 연결 수
+
+    요청 수보다 연결 수가 적을수록 keep-alive(HTTP/2는 다중화)로 연결을
+    재사용하고 있다는 뜻입니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.http2_requests = 0
+            self.connections = 0
+
+    def record(self, name: str):
+        with self._lock:
+            if name == "connection.connect_tcp.complete":
+                self.connections += 1
+            elif name in _REQUEST_EVENTS:
+                self.requests += 1
+                if name.startswith("http2."):
+                    self.http2_requests += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            reused = max(0, self.requests - self.connections)
+            return {
+                "requests": self.requests,
+                "http2_requests": self.http2_requests,
+                "connections": self.connections,
+                "reuse_ratio": reused / self.requests if self.requests else 0.0,
+            }
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """Async transport that keeps a separate connection pool per event loop.
+
+    Async connections belong to the loop that opened them, and this app
+    runs async work under short-lived loops (``asyncio.run`` per agent turn
+    or embedding call); sharing one pool across them would hand out
+    connections bound to a closed loop. Pools of finished loops are dropped
+    with the loop.
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        # 이벤트 루프 -> 그 루프의 커넥션 풀
+        self._pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = self._pools[loop] = httpx.AsyncHTTPTransport(**self._kwargs)
+            return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self):
+        with self._lock:
+            pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+    def clear(self):
+        with self._lock:
+            self._pools.clear()
+
+
+class HttpClients:
+    """프로세스 전체가 공유하는 httpx 클라이언트 (LLM / 임베딩 API 호출용)
+
+    클라이언트 객체를 호출마다 만들면 커넥션 풀도 매번 새로 생겨 TCP/TLS
+    연결을 재사용하지 못하므로, 한도/타임아웃을 맞춘 클라이언트 한 쌍(동기,
+    비동기)을 만들어 모든 모델 객체가 함께 씁니다. 요청/연결 수는 ``stats``에
+    집계됩니다.
+    """
+
+    def __init__(
+        self, limits: httpx.Limits, timeout: httpx.Timeout, http2: bool = True
+    ):
+        self.limits = limits
+        self.timeout = timeout
+        self.requested_http2 = http2
+        self.http2 = http2 and h2 is not None
+        self.stats = ConnectionStats()
+        self._lock = threading.Lock()
+        self._sync: Optional[httpx.Client] = None
+        self._async: Optional[httpx.AsyncClient] = None
+        self._async_transport: Optional[_LoopLocalTransport] = None
+        self._warned = False
+
+    def _warn_http1(self):
+        # HTTP/2를 요청했지만 h2가 없을 때 처음 클라이언트를 만들 때만 알림
+        if self.requested_http2 and not self.http2 and not self._warned:
+            self._warned = True
+            print("h2 is not installed, using HTTP/1.1")
+
+    def _trace(self, name: str, info: dict):
+        self.stats.record(name)
+
+    async def _atrace(self, name: str, info: dict):
+        self.stats.record(name)
+
+    def _trace_request(self, request: httpx.Request):
+        request.extensions["trace"] = self._trace
+
+    async def _atrace_request(self, request: httpx.Request):
+        request.extensions["trace"] = self._atrace
+
+    @property
+    def sync(self) -> httpx.Client:
+        with self._lock:
+            if self._sync is None:
+                self._warn_http1()
+                self._sync = httpx.Client(
+                    transport=httpx.HTTPTransport(http2=self.http2, limits=self.limits),
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    event_hooks={"request": [self._trace_request]},
+                )
+            return self._sync
+
+    @property
+    def async_(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async is None:
+                self._warn_http1()
+                self._async_transport = _LoopLocalTransport(
+                    http2=self.http2, limits=self.limits
+                )
+                self._async = httpx.AsyncClient(
+                    transport=self._async_transport,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    event_hooks={"request": [self._atrace_request]},
+                )
+            return self._async
+
+    def close(self):
+        """Close the pooled connections; the clients are recreated on next use."""
+        with self._lock:
+            sync, self._sync = self._sync, None
+            transport, self._async_transport = self._async_transport, None
+            self._async = None
+        if sync is not None:
+            sync.close()
+        if transport is not None:
+            # 비동기 연결은 각자의 이벤트 루프에 묶여 있으므로 참조만 끊음
+            transport.clear()
+
+
+if __name__ == "__main__":
+    # 연결 재사용 벤치마크 (로컬 HTTP 서버): python app/utils/http_clients.py [N]
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    limits = httpx.Limits(max_connections=10, max_keepalive_connections=10)
+    timeout = httpx.Timeout(10.0)
+
+    def report(label: str, clients: HttpClients, started: float):
+        elapsed = (time.perf_counter() - started) * 1000 / n
+        stats = clients.stats.snapshot()
+        print(
+            f"{label:<24}{elapsed:>8.2f} ms/req{stats['requests']:>8} requests"
+            f"{stats['connections']:>6} connections  reuse {stats['reuse_ratio']:.0%}"
+        )
+
+    # 호출마다 클라이언트를 새로 만드는 경우 (기존 방식)
+    fresh = HttpClients(limits, timeout, http2=False)
+    started = time.perf_counter()
+    for _ in range(n):
+        stats = fresh.stats
+        fresh = HttpClients(limits, timeout, http2=False)
+        fresh.stats = stats
+        fresh.sync.get(url)
+        fresh.close()
+    report("client per call", fresh, started)
+
+    shared = HttpClients(limits, timeout, http2=False)
+    started = time.perf_counter()
+    for _ in range(n):
+        shared.sync.get(url)
+    report("shared sync", shared, started)
+
+    # asyncio.run마다 새 이벤트 루프: 루프 안에서는 재사용, 루프 간에는 새 연결
+    shared.stats.reset()
+
+    async def burst():
+        for _ in range(10):
+            await shared.async_.get(url)
+
+    started = time.perf_counter()
+    for _ in range(n // 10):
+        asyncio.run(burst())
+    report("shared async (10/loop)", shared, started)
+    shared.close()
+    server.shutdown()
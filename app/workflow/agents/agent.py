@@ -2,9 +2,10 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, TypedDict
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
-from langfuse.langchain import CallbackHandler
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
-from utils.config import get_llm
+from utils.config import get_llm, settings
+from workflow.context_builder import count_tokens, trim_history
 from workflow.state import RootState
 
 
@@ -14,18 +15,17 @@ class AgentState(TypedDict):
     context: str  # 검색된 컨텍스트
     messages: List[BaseMessage]  # LLM에 전달할 메시지
     response: str  # LLM 응답
+    token_usage: Dict[str, int]  # 이번 턴 프롬프트 토큰 수 (항목별)
 
 
 # 에이전트 추상 클래스 정의
 class Agent(ABC):
-    def __init__(
-        self, system_prompt: str, role: str, session_id: str = None, k: int = 5
-    ):
+    # 세션별 상태를 갖지 않으므로 한 번 만들어 모든 세션이 공유
+    def __init__(self, system_prompt: str, role: str, k: int = 5):
         self.system_prompt = system_prompt
         self.role = role
         self.k = k
         self._setup_graph()  # 그래프 설정
-        self.session_id = session_id  # langfuse 세션 ID
 
     def _setup_graph(self):
         # 그래프 생성
@@ -57,26 +57,43 @@ class Agent(ABC):
         root_state = state["root_state"]
         context = state["context"]
 
-        # 시스템 프롬프트로 시작
-        messages = [SystemMessage(content=self.system_prompt)]
-
-        # 기존 대화 기록 추가
+        # 기존 대화 기록 (최근 메시지부터 토큰 예산까지만)
+        history = []
         for message in root_state["messages"]:
             if message["role"] == "assistant":
-                messages.append(AIMessage(content=message["content"]))
+                history.append(AIMessage(content=message["content"]))
             elif message["role"] == "user":
-                messages.append(HumanMessage(content=message["content"]))
+                history.append(HumanMessage(content=message["content"]))
             else:
-                messages.append(
+                history.append(
                     HumanMessage(content=f"{message['role']}: {message['content']}")
                 )
+        kept, history_tokens = trim_history(history, settings.HISTORY_TOKEN_BUDGET)
 
         # 프롬프트 생성 (검색된 컨텍스트 포함)
         prompt = self._create_prompt({**root_state, "context": context})
+
+        # 시스템 프롬프트 + 대화 기록 + 프롬프트
+        messages = [SystemMessage(content=self.system_prompt), *kept]
         messages.append(HumanMessage(content=prompt))
 
+        context_tokens = count_tokens(context)
+        token_usage = {
+            "system": count_tokens(self.system_prompt),
+            "history": history_tokens,
+            "context": context_tokens,
+            "prompt": count_tokens(prompt) - context_tokens,
+        }
+        token_usage["total"] = sum(token_usage.values())
+        print(
+            f"[{self.role}] prompt tokens: {token_usage['total']} "
+            f"(system {token_usage['system']}, "
+            f"history {history_tokens} / {len(kept)} of {len(history)} messages, "
+            f"context {context_tokens}, prompt {token_usage['prompt']})"
+        )
+
         # 상태 업데이트
-        return {**state, "messages": messages}
+        return {**state, "messages": messages, "token_usage": token_usage}
 
     # 최신 사용자 쿼리 추출 헬퍼 메서드
     def _get_latest_user_query(self, state: Dict[str, Any]) -> str:
@@ -93,12 +110,14 @@ class Agent(ABC):
     def _create_prompt(self, state: Dict[str, Any]) -> str:
         pass
 
-    # LLM 호출
+    # LLM 호출 (토큰 단위로 받아 워크플로의 messages 스트림으로 화면에 전달)
     def _generate_response(self, state: AgentState) -> AgentState:
         messages = state["messages"]
-        response = get_llm().invoke(messages)
+        response = None
+        for chunk in get_llm().stream(messages):
+            response = chunk if response is None else response + chunk
 
-        return {**state, "response": response.content}
+        return {**state, "response": response.content if response else ""}
 
     # 상태 업데이트
     def _update_state(self, state: AgentState) -> AgentState:
@@ -121,24 +140,14 @@ class Agent(ABC):
         return {**state, "root_state": new_root_state}
 
     # 토론 실행
-    def run(self, state: RootState) -> RootState:
+    def run(self, state: RootState, config: RunnableConfig) -> RootState:
         # 초기 에이전트 상태 구성
-        agent_state = AgentState(root_state=state, context="", messages=[], response="")
-
-        # 내부 그래프 실행
-        try:
-            langfuse_handler = CallbackHandler()
-            result = self.graph.invoke(
-                agent_state,
-                config={"callbacks": [langfuse_handler], "session_id": self.session_id},
-            )
-        except Exception as e:
-            # Fallback if Langfuse fails or is not configured
-            print(f"Warning: Langfuse callback failed or disabled: {e}")
-            result = self.graph.invoke(
-                agent_state,
-                config={"session_id": self.session_id},
-            )
+        agent_state = AgentState(
+            root_state=state, context="", messages=[], response="", token_usage={}
+        )
+
+        # 내부 그래프 실행 (세션 ID, 콜백은 상위 그래프의 실행 설정을 그대로 사용)
+        result = self.graph.invoke(agent_state, config=config)
 
         # 최종 상태 반환
         return result["root_state"]
@@ -1,23 +1,27 @@
 import asyncio
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from langchain.agents import create_agent
 from langchain.agents.middleware import SummarizationMiddleware
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langfuse.langchain import CallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
 from utils.config import get_llm
 from workflow.agents.agent import Agent, AgentState
+from workflow.mcp_pool import exa_mcp_pool
 from workflow.state import AgentType, RootState
 
+# 도구 없이 답변할 때 사용하는 (캐시 키가 되는) 빈 목록
+NO_TOOLS: List[BaseTool] = []
+
 
 class GeneralAgent(Agent):
-    def __init__(self, session_id: str, k: int = 5):
+    def __init__(self, k: int = 5):
         super().__init__(
             system_prompt="You are a helpful assistant. You can specific tools to answer the user query.",
             role=AgentType.GENERAL,
-            session_id=session_id,
             k=k,
         )
+        self._agent = None  # (도구 목록, 에이전트)
 
     def _create_prompt(self, state: Dict[str, Any]) -> str:
         user_query = self._get_latest_user_query(state)
@@ -29,28 +33,12 @@ class GeneralAgent(Agent):
             prompt += f"\n\nHere is the full text or context from the selected documents. Use this to answer the user's question, especially if they ask for a summary:\n{context}"
         return prompt
 
-    async def _generate_response(self, state: AgentState) -> AgentState:
-        client = MultiServerMCPClient(
-            {
-                "exa": {
-                    "transport": "http",
-                    "url": "https://mcp.exa.ai/mcp?tools=web_search_exa,get_code_context_exa",
-                }
-            }
-        )
+    def _get_agent(self, tools: List[BaseTool]):
+        # 도구 목록이 바뀐 경우에만 에이전트를 새로 생성 (턴마다 재사용)
+        cached = self._agent
+        if cached is not None and cached[0] is tools:
+            return cached[1]
 
-        # Load tools from the client
-        try:
-            tools = await client.get_tools()
-        except Exception as e:
-            # Fallback or error handling if tools fail to load
-            print(f"Failed to load MCP tools: {e}")
-            return {
-                **state,
-                "response": "Sorry, I encountered an error while initializing the general tools.",
-            }
-
-        # Create and run a react agent with the tools
         model = get_llm()
         agent = create_agent(
             model,
@@ -64,30 +52,47 @@ class GeneralAgent(Agent):
                 )
             ],
         )
+        self._agent = (tools, agent)
+        return agent
+
+    async def _generate_response(self, state: AgentState) -> AgentState:
+        # Load tools from the shared MCP session pool (cached, refreshed by TTL)
+        try:
+            tools = await exa_mcp_pool.aget_tools()
+        except Exception as e:
+            # 웹 검색 서버에 연결할 수 없으면 도구 없이 답변
+            print(f"Failed to load MCP tools, answering without tools: {e}")
+            tools = NO_TOOLS
+
+        agent = self._get_agent(tools)
 
         # Use the messages prepared by _prepare_messages
         messages = state["messages"]
 
         # Invoke the agent
-        agent_response = await agent.ainvoke({"messages": messages})
+        try:
+            agent_response = await agent.ainvoke({"messages": messages})
+        except Exception as e:
+            if tools is NO_TOOLS:
+                raise
+            # 도구 호출 중 서버가 끊기면 도구 없이 다시 답변
+            print(f"MCP tool call failed, answering without tools: {e}")
+            agent_response = await self._get_agent(NO_TOOLS).ainvoke(
+                {"messages": messages}
+            )
 
         # Extract the last message content
         response_content = agent_response["messages"][-1].content
 
         return {**state, "response": response_content}
 
-    def run(self, state: RootState) -> RootState:
+    def run(self, state: RootState, config: RunnableConfig) -> RootState:
         # Override run to handle async execution since _generate_response is async
-        agent_state = AgentState(root_state=state, context="", messages=[], response="")
-
-        langfuse_handler = CallbackHandler()
+        agent_state = AgentState(
+            root_state=state, context="", messages=[], response="", token_usage={}
+        )
 
         # Use ainvoke because the graph contains async nodes (_generate_response)
-        result = asyncio.run(
-            self.graph.ainvoke(
-                agent_state,
-                config={"callbacks": [langfuse_handler], "session_id": self.session_id},
-            )
-        )
+        result = asyncio.run(self.graph.ainvoke(agent_state, config=config))
 
         return result["root_state"]
@@ -15,11 +15,10 @@ class RouteDecision(BaseModel):
 
 
 class MasterAgent(Agent):
-    def __init__(self, session_id: str):
+    def __init__(self):
         super().__init__(
             system_prompt="You are a helpful assistant.",
             role=AgentType.MASTER,
-            session_id=session_id,
         )
 
     def _retrieve_context(self, state: AgentState) -> AgentState:
@@ -62,8 +61,12 @@ class MasterAgent(Agent):
     def _generate_response(self, state: AgentState) -> AgentState:
         messages = state["messages"]
 
-        # Use structured output
-        llm = get_llm().with_structured_output(RouteDecision)
+        # Use structured output (라우팅 JSON은 화면에 스트리밍하지 않음)
+        llm = (
+            get_llm()
+            .with_structured_output(RouteDecision)
+            .with_config(tags=["nostream"])
+        )
         response = llm.invoke(messages)
 
         return {**state, "response": response}
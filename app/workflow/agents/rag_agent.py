@@ -1,17 +1,17 @@
-import os
 from typing import Any, Dict
 
 from retrieval.vector_store import search_pdfs
+from utils.config import settings
 from workflow.agents.agent import Agent
+from workflow.context_builder import build_context
 from workflow.state import AgentType
 
 
 class RagAgent(Agent):
-    def __init__(self, session_id: str):
+    def __init__(self):
         super().__init__(
             system_prompt="You are a helpful assistant that summarizes research papers. Use the provided context to create a comprehensive summary. if user query is in Korean answer in Korean",
             role=AgentType.RAG,
-            session_id=session_id,
         )
 
         # 자료 검색
@@ -27,8 +27,10 @@ class RagAgent(Agent):
         query = last_human_msg["content"] if last_human_msg else ""
 
         # RAG Search on persistent Vector Store
-        # We search across all indexed documents.
-        docs = search_pdfs(query, k=self.k)
+        # Restricted to the documents selected in the sidebar (all if none).
+        docs = search_pdfs(
+            query, k=self.k, documents=root_state.get("active_documents")
+        )
 
         # 컨텍스트 포맷팅
         context = self._format_context(docs)
@@ -36,17 +38,9 @@ class RagAgent(Agent):
         # 상태 업데이트
         return {**state, "context": context}
 
-    # 검색 결과로 Context 생성
+    # 검색 결과로 Context 생성 (관련도 순으로 토큰 예산까지)
     def _format_context(self, docs: list) -> str:
-        context = ""
-        for i, doc in enumerate(docs):
-            source = doc.metadata.get("source", "Unknown")
-            page = doc.metadata.get("page", "")
-            context += f"Original PDF name: {os.path.basename(source)}"
-            if page:
-                context += f", page: {page}"
-            context += f"\n{doc.page_content}\n\n"
-        return context
+        return build_context(docs, settings.CONTEXT_TOKEN_BUDGET).text
 
     def _create_prompt(self, state: Dict[str, Any]) -> str:
         user_query = self._get_latest_user_query(state)
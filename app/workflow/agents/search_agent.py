@@ -1,21 +1,19 @@
 import asyncio
-import os
 from typing import Any, Dict
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langfuse.langchain import CallbackHandler
+from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import create_react_agent
 from utils.config import get_llm
 from workflow.agents.agent import Agent, AgentState
+from workflow.mcp_pool import arxiv_mcp_pool
 from workflow.state import AgentType, RootState
 
 
 class SearchAgent(Agent):
-    def __init__(self, session_id: str):
+    def __init__(self):
         super().__init__(
             system_prompt="You are a helpful research paper search agent. Search for useful research paper based on user query. If user query is in Korean answer in Korean",
             role=AgentType.SEARCH,
-            session_id=session_id,
         )
 
     def _create_prompt(self, state: Dict[str, Any]) -> str:
@@ -23,29 +21,9 @@ class SearchAgent(Agent):
         return f"User query: {user_query}\n\nIf user query is in Korean, answer in Korean.\n\nSearch for useful research paper based on user query"
 
     async def _generate_response(self, state: AgentState) -> AgentState:
-        # Define storage path for papers (using a temp dir or project dir)
-        storage_path = os.path.join(os.getcwd(), "data", "papers")
-        os.makedirs(storage_path, exist_ok=True)
-
-        client = MultiServerMCPClient(
-            {
-                "arxiv": {
-                    "transport": "stdio",
-                    "command": "uv",
-                    "args": [
-                        "tool",
-                        "run",
-                        "arxiv-mcp-server",
-                        "--storage-path",
-                        storage_path,
-                    ],
-                }
-            }
-        )
-
-        # Load tools from the client
+        # Load tools from the shared MCP session pool (server stays running)
         try:
-            tools = await client.get_tools()
+            tools = await arxiv_mcp_pool.aget_tools()
         except Exception as e:
             # Fallback or error handling if tools fail to load
             print(f"Failed to load MCP tools: {e}")
@@ -69,18 +47,13 @@ class SearchAgent(Agent):
 
         return {**state, "response": response_content}
 
-    def run(self, state: RootState) -> RootState:
+    def run(self, state: RootState, config: RunnableConfig) -> RootState:
         # Override run to handle async execution since _generate_response is async
-        agent_state = AgentState(root_state=state, context="", messages=[], response="")
-
-        langfuse_handler = CallbackHandler()
+        agent_state = AgentState(
+            root_state=state, context="", messages=[], response="", token_usage={}
+        )
 
         # Use ainvoke because the graph contains async nodes (_generate_response)
-        result = asyncio.run(
-            self.graph.ainvoke(
-                agent_state,
-                config={"callbacks": [langfuse_handler], "session_id": self.session_id},
-            )
-        )
+        result = asyncio.run(self.graph.ainvoke(agent_state, config=config))
 
         return result["root_state"]
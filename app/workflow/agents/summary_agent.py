@@ -1,43 +1,177 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
-from retrieval.vector_store import get_all_documents
+from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.config import get_stream_writer
+from retrieval.summaries import (
+    MAX_SUMMARY_LEVELS,
+    DocumentSummary,
+    pack,
+    run_summaries,
+    summary_store,
+)
+from retrieval.vector_store import get_all_documents, list_indexed_documents
+from utils.config import get_llm_model_name, settings
 from workflow.agents.agent import Agent
+from workflow.context_builder import build_context, count_tokens, dedupe_chunks
 from workflow.state import AgentType
 
+MAP_PROMPT = "You summarize part of a research paper collection. Write a dense summary of the given text that keeps the key contributions, methods, results and numbers relevant to the user query. Answer in the language of the user query."
+
 
 class SummaryAgent(Agent):
-    def __init__(self, session_id: str):
+    def __init__(self):
         super().__init__(
             system_prompt="You are a helpful assistant that summarizes research papers. Use the provided context to create a comprehensive summary. if user query is in Korean answer in Korean",
             role=AgentType.SUMMARY,
-            session_id=session_id,
         )
 
         # 자료 검색
 
     def _retrieve_context(self, state: Dict[str, Any]) -> Dict[str, Any]:
         # RAG Search on persistent Vector Store
-        # We search across all indexed documents.
-        docs = get_all_documents()
+        # Restricted to the documents selected in the sidebar (all if none).
+        indexed = list_indexed_documents()
+        names = [
+            name
+            for name in state["root_state"].get("active_documents") or indexed
+            if name in indexed
+        ]
+
+        # 색인 시 미리 만든 요약이 있는 문서는 요약으로, 나머지만 청크로 처리
+        stored = summary_store.get_many(
+            {indexed[name]["sha256"] for name in names if indexed[name]["sha256"]},
+            get_llm_model_name(),
+        )
+        precomputed = {
+            name: stored[indexed[name]["sha256"]]
+            for name in names
+            if indexed[name]["sha256"] in stored
+        }
+        missing = [name for name in names if name not in precomputed]
+
+        budget = settings.CONTEXT_TOKEN_BUDGET
+        # 요약이 없는 문서의 청크에 쓸 몫은 문서 수 비율만큼 남겨 둠
+        summary_budget = budget * len(precomputed) // max(len(names), 1)
+        context = self._format_summaries(precomputed, summary_budget)
+        if missing:
+            docs = dedupe_chunks(get_all_documents(missing))
 
-        # 컨텍스트 포맷팅
-        context = self._format_context(docs)
+            # 컨텍스트 포맷팅 (요약이 쓰고 남은 예산까지)
+            remaining = budget - count_tokens(context)
+            built = build_context(docs, remaining)
+            chunk_context = built.text
+
+            # 한 번에 넣기엔 길면 문서별 요약을 먼저 만들어 그 요약들로 답변 (map-reduce)
+            if built.dropped:
+                query = self._get_latest_user_query(state["root_state"])
+                chunk_context = self._map_reduce(query, docs, remaining)
+            context += chunk_context
 
         # 상태 업데이트
         return {**state, "context": context}
 
-    # 검색 결과로 Context 생성
-    def _format_context(self, docs: list) -> str:
-        context = ""
-        for i, doc in enumerate(docs):
-            source = doc.metadata.get("source", "Unknown")
-            page = doc.metadata.get("page", "")
-            context += f"Original PDF name: {os.path.basename(source)}"
-            if page:
-                context += f", page: {page}"
-            context += f"\n{doc.page_content}\n\n"
-        return context
+    def _format_summaries(
+        self, summaries: Dict[str, DocumentSummary], budget: int
+    ) -> str:
+        """Context from precomputed summaries within ``budget`` tokens.
+
+        Section summaries are included if all of them fit; otherwise only
+        the document overviews are used, as many as fit.
+        """
+        overviews = [
+            f"Original PDF name: {name}\n{summary.summary}\n\n"
+            for name, summary in summaries.items()
+        ]
+        detailed = [
+            overview
+            + "".join(f"{title}: {text}\n\n" for title, text in summary.sections)
+            for overview, summary in zip(overviews, summaries.values())
+        ]
+        if count_tokens("".join(detailed)) <= budget:
+            return "".join(detailed)
+
+        parts: List[str] = []
+        tokens = 0
+        for overview in overviews:
+            size = count_tokens(overview)
+            if tokens + size > budget:
+                continue
+            parts.append(overview)
+            tokens += size
+        if len(parts) < len(overviews):
+            print(
+                f"[{self.role}] {len(overviews) - len(parts)} of {len(overviews)} "
+                "document summaries did not fit in the context budget"
+            )
+        return "".join(parts)
+
+    def _map_reduce(self, query: str, docs: list, budget: int) -> str:
+        """Summarize each document, then merge the summaries until they fit.
+
+        Map: every document's chunks are packed into ``SUMMARY_MAP_CHARS``
+        groups and summarized in parallel; documents with several partial
+        summaries are summarized again until one remains per document.
+        Reduce: if the document summaries together are still longer than
+        ``budget`` tokens, they are grouped and summarized again. The final
+        answer is generated from the result as usual.
+        """
+        limit = settings.SUMMARY_MAP_CHARS
+        parts: Dict[str, List[str]] = {}
+        for doc in docs:
+            name = os.path.basename(doc.metadata.get("source", "Unknown"))
+            parts.setdefault(name, []).append(doc.page_content)
+
+        for level in range(1, MAX_SUMMARY_LEVELS + 1):
+            jobs = [
+                (name, group)
+                for name, texts in parts.items()
+                for group in pack(texts, limit)
+            ]
+            summaries = self._summarize(query, jobs, f"문서 요약 {level}단계")
+            parts = {}
+            for (name, _), summary in zip(jobs, summaries):
+                if summary:
+                    parts.setdefault(name, []).append(summary)
+            if all(len(texts) == 1 for texts in parts.values()):
+                break
+
+        sections = [
+            f"Original PDF name: {name}\n" + "\n\n".join(texts)
+            for name, texts in parts.items()
+        ]
+        for level in range(1, MAX_SUMMARY_LEVELS + 1):
+            if len(sections) <= 1 or count_tokens("\n\n".join(sections)) <= budget:
+                break
+            jobs = [("several papers", group) for group in pack(sections, limit)]
+            sections = [
+                summary
+                for summary in self._summarize(query, jobs, f"요약 병합 {level}단계")
+                if summary
+            ]
+        return "\n\n".join(sections)
+
+    def _summarize(
+        self, query: str, jobs: List[Tuple[str, str]], stage: str
+    ) -> List[str]:
+        """Run one summary call per (document name, text) job, in parallel."""
+        writer = get_stream_writer()
+
+        def on_progress(done: int, total: int):
+            writer({"agent": self.role, "status": f"{stage} ({done}/{total})"})
+
+        return run_summaries(
+            [
+                [
+                    SystemMessage(content=MAP_PROMPT),
+                    HumanMessage(
+                        content=f"User query: {query}\n\nOriginal PDF name: {name}\n\n{text}"
+                    ),
+                ]
+                for name, text in jobs
+            ],
+            on_progress,
+        )
 
     def _create_prompt(self, state: Dict[str, Any]) -> str:
         user_query = self._get_latest_user_query(state)
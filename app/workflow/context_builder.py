@@ -0,0 +1,134 @@
+import os
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+from utils.config import get_llm_model_name
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# 모델 이름으로 토크나이저를 찾지 못하면 사용하는 인코딩
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        # 인코딩 파일을 받을 수 없는 환경이면 근사치 사용
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count of ``text`` with the chat model's tokenizer."""
+    if not text:
+        return 0
+    encoding = _encoding(model or get_llm_model_name())
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # 한글은 글자당 1토큰 안팎이므로 글자 수 대신 UTF-8 바이트 수로 근사
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+def dedupe_chunks(docs: List[Document]) -> List[Document]:
+    """Drop text repeated by the splitter's chunk overlap, keeping order.
+
+    Chunks of the same page carry ``start_index``: a chunk fully covered by
+    one already kept is dropped and one that overlaps it loses the
+    overlapping part. Identical texts are kept once.
+    """
+    spans: Dict[Tuple, List[Tuple[int, int]]] = {}
+    seen = set()
+    result = []
+    for doc in docs:
+        text = doc.page_content
+        if text in seen:
+            continue
+        seen.add(text)
+
+        origin = doc.metadata.get("start_index")
+        if not isinstance(origin, int):
+            result.append(doc)
+            continue
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        start, end = origin, origin + len(text)
+        for kept_start, kept_end in spans.get(key, []):
+            if kept_start <= start < kept_end:
+                start = kept_end
+            elif kept_start < end <= kept_end:
+                end = kept_start
+        if end <= start:
+            continue
+        spans.setdefault(key, []).append((start, end))
+        if (start, end) != (origin, origin + len(text)):
+            doc = Document(
+                id=doc.id,
+                page_content=text[start - origin : end - origin],
+                metadata={**doc.metadata, "start_index": start},
+            )
+        result.append(doc)
+    return result
+
+
+def format_chunk(doc: Document) -> str:
+    source = doc.metadata.get("source", "Unknown")
+    page = doc.metadata.get("page", "")
+    text = f"Original PDF name: {os.path.basename(source)}"
+    if page:
+        text += f", page: {page}"
+    return text + f"\n{doc.page_content}\n\n"
+
+
+class BuiltContext(NamedTuple):
+    text: str
+    tokens: int
+    chunks: int  # 포함된 청크 수
+    dropped: int  # 예산을 넘어 빠진 청크 수
+
+
+def build_context(docs: List[Document], budget: int) -> BuiltContext:
+    """Fill up to ``budget`` tokens with chunks, most relevant (first) first.
+
+    Overlapping chunks are deduplicated first; a chunk that does not fit is
+    skipped so a later, shorter one can still use the remaining budget.
+    """
+    parts: List[str] = []
+    tokens = dropped = 0
+    for doc in dedupe_chunks(docs):
+        part = format_chunk(doc)
+        size = count_tokens(part)
+        if tokens + size > budget:
+            dropped += 1
+            continue
+        parts.append(part)
+        tokens += size
+    return BuiltContext("".join(parts), tokens, len(parts), dropped)
+
+
+def trim_history(
+    messages: List[BaseMessage], budget: int
+) -> Tuple[List[BaseMessage], int]:
+    """Keep the most recent messages that fit in ``budget`` tokens."""
+    kept: List[BaseMessage] = []
+    tokens = 0
+    for message in reversed(messages):
+        size = count_tokens(message.content)
+        if tokens + size > budget:
+            break
+        kept.append(message)
+        tokens += size
+    kept.reverse()
+    return kept, tokens
@@ -1,3 +1,7 @@
+import sys
+import time
+from functools import lru_cache
+
 from langgraph.graph import END, StateGraph
 from workflow.agents.general_agent import GeneralAgent
 from workflow.agents.master_agent import MasterAgent
@@ -7,14 +11,14 @@ from workflow.agents.summary_agent import SummaryAgent
 from workflow.state import AgentType, RootState
 
 
-def create_workflow(session_id: str = ""):
+def build_workflow():
     workflow = StateGraph(RootState)
 
-    master_agent = MasterAgent(session_id=session_id)
-    general_agent = GeneralAgent(session_id=session_id)
-    search_agent = SearchAgent(session_id=session_id)
-    summary_agent = SummaryAgent(session_id=session_id)
-    rag_agent = RagAgent(session_id=session_id)
+    master_agent = MasterAgent()
+    general_agent = GeneralAgent()
+    search_agent = SearchAgent()
+    summary_agent = SummaryAgent()
+    rag_agent = RagAgent()
 
     workflow.add_node(AgentType.MASTER, master_agent.run)
     workflow.add_node(AgentType.GENERAL, general_agent.run)
@@ -46,7 +50,28 @@ def create_workflow(session_id: str = ""):
     return workflow.compile()
 
 
+@lru_cache(maxsize=1)
+def create_workflow():
+    """Compiled workflow, built once per process and shared by all sessions.
+
+    Agents hold no per-session state; the session ID and callbacks are
+    passed in the run config of each ``stream``/``invoke`` call.
+    """
+    return build_workflow()
+
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["bench"]:
+        # 턴당 그래프 구성 오버헤드: python app/workflow/graph.py bench [N]
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        for label, build in (("per turn", build_workflow), ("cached", create_workflow)):
+            started = time.perf_counter()
+            for _ in range(n):
+                build()
+            elapsed = (time.perf_counter() - started) * 1000 / n
+            print(f"{label:<10}{elapsed:>10.3f} ms/turn")
+        sys.exit()
+
     graph = create_workflow()
 
     graph_image = graph.get_graph().draw_mermaid_png()
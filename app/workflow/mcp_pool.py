@@ -0,0 +1,439 @@
+import asyncio
+import atexit
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import Connection, create_session
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import ClientSession
+from mcp.types import Tool
+from utils.config import http_clients, settings
+
+# 상태 확인(ping) 응답을 기다리는 최대 시간 (초)
+PING_TIMEOUT = 10.0
+# 서버에 연결하지 못한 뒤 다시 시도하기까지 기다리는 시간 (초)
+FAILURE_BACKOFF = 30.0
+
+
+def http2_client_factory(
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    auth: Optional[httpx.Auth] = None,
+) -> httpx.AsyncClient:
+    """httpx client for MCP HTTP sessions that keeps its connection alive.
+
+    The MCP client closes each SSE response as soon as the result arrives;
+    over HTTP/1.1 that discards the connection, while over HTTP/2 only the
+    stream is reset and the connection is reused for the next call. HTTP/2
+    follows ``settings.HTTP2`` and is skipped when ``h2`` is not installed.
+    """
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout or httpx.Timeout(30.0),
+        auth=auth,
+        follow_redirects=True,
+        http2=http_clients.http2,
+    )
+
+
+class _Slot:
+    """One MCP session, kept open by a task that owns its context manager."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.task: Optional[asyncio.Task] = None
+        self.closing: Optional[asyncio.Event] = None
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.session is not None and self.task is not None and not self.task.done()
+        )
+
+
+class _PooledSession:
+    """Stand-in session for converted tools: runs each call on the pool's loop."""
+
+    def __init__(self, pool: "McpSessionPool"):
+        self.pool = pool
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any], **kwargs):
+        # 진행 상황 콜백은 다른 이벤트 루프에서 호출할 수 없으므로 전달하지 않음
+        return await asyncio.wrap_future(
+            self.pool._submit(self.pool._call(name, arguments))
+        )
+
+
+class McpSessionPool:
+    """프로세스 전체가 공유하는 MCP 세션 풀
+
+    stdio 서버를 매 질의마다 새로 띄우지 않도록 세션을 ``size``개 열어 두고
+    재사용합니다. 세션은 전용 이벤트 루프 스레드에서 유지되고(에이전트는 호출마다
+    asyncio.run으로 새 루프를 만들기 때문), 도구 호출은 그 루프로 넘겨 실행합니다.
+    주기적으로 ping을 보내 죽은 서버는 다시 띄우고, 도구 스키마는 조회 결과를
+    캐시해 ``tools_ttl``마다 갱신합니다. HTTP 서버도 같은 방식으로 세션(연결)을
+    유지해 매 질의의 핸드셰이크와 도구 조회를 생략합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connection: Connection,
+        size: int = 2,
+        ping_interval: float = 30.0,
+        tools_ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.connection = connection
+        self.size = max(1, size)
+        self.ping_interval = ping_interval
+        self.tools_ttl = tools_ttl
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: List[_Slot] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._tools: Optional[List[BaseTool]] = None
+        self._schemas: List[dict] = []
+        self._tools_loaded = 0.0
+        self._loading: Optional[asyncio.Future] = None
+        self._failed_at = float("-inf")
+        self._started = None
+        self._health: Optional[asyncio.Task] = None
+
+    # --- 이벤트 루프 스레드 ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name=f"mcp-{self.name}", daemon=True
+                ).start()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def _start(self):
+        if self._started is None:
+            self._started = asyncio.ensure_future(self._open_all())
+        await self._started
+
+    async def _open_all(self):
+        self._idle = asyncio.Queue()
+        self._slots = [_Slot(i) for i in range(self.size)]
+        results = await asyncio.gather(
+            *(self._open(slot) for slot in self._slots), return_exceptions=True
+        )
+        for slot, result in zip(self._slots, results):
+            if isinstance(result, Exception):
+                print(
+                    f"Failed to start MCP server '{self.name}' #{slot.index}: {result}"
+                )
+            self._idle.put_nowait(slot)
+        if self.ping_interval > 0:
+            self._health = asyncio.ensure_future(self._health_loop())
+
+    # --- 세션 관리 ---
+
+    async def _hold(self, slot: _Slot, ready: asyncio.Future):
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                slot.session = session
+                ready.set_result(None)
+                await slot.closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            elif (
+                not isinstance(e, asyncio.CancelledError) and not slot.closing.is_set()
+            ):
+                print(f"MCP server '{self.name}' #{slot.index} exited: {e}")
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            slot.session = None
+
+    async def _open(self, slot: _Slot):
+        ready = asyncio.get_running_loop().create_future()
+        slot.closing = asyncio.Event()
+        slot.task = asyncio.ensure_future(self._hold(slot, ready))
+        await ready
+
+    async def _shutdown(self, slot: _Slot):
+        if slot.task is None:
+            return
+        slot.closing.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(slot.task), 5)
+        except Exception:
+            slot.task.cancel()
+        slot.task = None
+
+    async def _restart(self, slot: _Slot):
+        await self._shutdown(slot)
+        self.restarts += 1
+        await self._open(slot)
+
+    async def _request(self, slot: _Slot, coro):
+        """Await a session request, failing as soon as the session itself ends.
+
+        A request in flight when the server dies would otherwise wait forever
+        for its response.
+        """
+        owner = slot.task
+        request = asyncio.ensure_future(coro)
+        try:
+            await asyncio.wait({request, owner}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            pending = not request.done()
+            if pending:
+                request.cancel()
+        if pending:
+            raise ConnectionError(
+                f"MCP server '{self.name}' #{slot.index} disconnected"
+            )
+        return request.result()
+
+    async def _healthy(self, slot: _Slot) -> bool:
+        if not slot.alive:
+            return False
+        try:
+            await asyncio.wait_for(
+                self._request(slot, slot.session.send_ping()), PING_TIMEOUT
+            )
+            return True
+        except Exception:
+            return False
+
+    async def _checkout(self) -> _Slot:
+        await self._start()
+        slot = await self._idle.get()
+        if not slot.alive:
+            try:
+                await self._restart(slot)
+            except BaseException:
+                self._idle.put_nowait(slot)
+                raise
+        return slot
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            # 사용 중이 아닌 세션만 확인
+            for _ in range(self._idle.qsize()):
+                slot = self._idle.get_nowait()
+                try:
+                    if not await self._healthy(slot):
+                        print(f"Restarting MCP server '{self.name}' #{slot.index}")
+                        await self._restart(slot)
+                except Exception as e:
+                    print(
+                        f"Failed to restart MCP server '{self.name}' #{slot.index}: {e}"
+                    )
+                finally:
+                    self._idle.put_nowait(slot)
+
+    # --- 도구 ---
+
+    async def _call(self, name: str, arguments: Dict[str, Any]):
+        slot = await self._checkout()
+        try:
+            try:
+                return await self._request(
+                    slot, slot.session.call_tool(name, arguments)
+                )
+            except Exception:
+                # 서버가 죽어서 실패한 경우에만 다시 띄워 한 번 재시도
+                if await self._healthy(slot):
+                    raise
+                print(f"MCP server '{self.name}' #{slot.index} is down, restarting")
+                await self._restart(slot)
+                return await self._request(
+                    slot, slot.session.call_tool(name, arguments)
+                )
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _fetch_tools(self) -> List[Tool]:
+        slot = await self._checkout()
+        try:
+            tools, cursor = [], None
+            while True:
+                page = await self._request(slot, slot.session.list_tools(cursor=cursor))
+                tools.extend(page.tools)
+                cursor = page.nextCursor
+                if not cursor:
+                    break
+            return tools
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _list_tools(self) -> List[BaseTool]:
+        now = time.monotonic()
+        if self._tools is not None and (
+            self.tools_ttl is None or now - self._tools_loaded < self.tools_ttl
+        ):
+            return self._tools
+        # 서버가 응답하지 않으면 한동안은 연결을 다시 시도하지 않고 바로 실패
+        if self._tools is None and now - self._failed_at < FAILURE_BACKOFF:
+            raise RuntimeError(f"MCP server '{self.name}' is unavailable")
+
+        # 동시에 들어온 요청은 진행 중인 조회 하나를 함께 기다림
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load_tools(now))
+            self._loading.add_done_callback(self._loaded)
+        return await asyncio.shield(self._loading)
+
+    def _loaded(self, future: asyncio.Future):
+        self._loading = None
+        if not future.cancelled():
+            future.exception()  # 기다리는 호출이 없어도 경고가 남지 않도록 확인
+
+    async def _load_tools(self, now: float) -> List[BaseTool]:
+        try:
+            tools = await self._fetch_tools()
+        except Exception as e:
+            self._failed_at = now
+            if self._tools is None:
+                raise
+            # 목록 갱신에 실패하면 이전 도구를 계속 사용
+            print(f"Failed to refresh MCP tools for '{self.name}': {e}")
+            self._tools_loaded = now
+            return self._tools
+
+        # 스키마가 그대로면 같은 리스트를 돌려줘 호출 측 캐시(에이전트 등)를 유지
+        schemas = [tool.model_dump(exclude_none=True) for tool in tools]
+        if self._tools is None or schemas != self._schemas:
+            session = _PooledSession(self)
+            self._tools = [
+                convert_mcp_tool_to_langchain_tool(session, tool, server_name=self.name)
+                for tool in tools
+            ]
+            self._schemas = schemas
+        self._tools_loaded = now
+        return self._tools
+
+    async def aget_tools(self) -> List[BaseTool]:
+        """LangChain tools of the server.
+
+        The list is cached and re-fetched after ``tools_ttl`` seconds (never if
+        None); the same list object is returned while the schemas are unchanged.
+        Concurrent callers share a single fetch.
+        """
+        return await asyncio.wrap_future(self._submit(self._list_tools()))
+
+    def get_tools(self) -> List[BaseTool]:
+        return self._submit(self._list_tools()).result()
+
+    def warm_up(self):
+        """Start the servers and load the tools in the background (non-blocking).
+
+        Only the first call does anything, so it is safe on every script rerun.
+        """
+        if self._loop is not None:
+            return
+
+        def report(future):
+            if future.exception() is not None:
+                print(f"MCP warm-up failed for '{self.name}': {future.exception()}")
+
+        self._submit(self._list_tools()).add_done_callback(report)
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or not loop.is_running():
+            return
+
+        async def shutdown():
+            if self._health is not None:
+                self._health.cancel()
+            await asyncio.gather(
+                *(self._shutdown(slot) for slot in self._slots), return_exceptions=True
+            )
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(10)
+        except Exception as e:
+            print(f"Error closing MCP sessions for '{self.name}': {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+
+# 논문 저장 경로 (arxiv-mcp-server가 내려받은 논문을 저장)
+ARXIV_STORAGE_PATH = os.path.join(os.getcwd(), "data", "papers")
+os.makedirs(ARXIV_STORAGE_PATH, exist_ok=True)
+
+arxiv_mcp_pool = McpSessionPool(
+    "arxiv",
+    {
+        "transport": "stdio",
+        "command": "uv",
+        "args": [
+            "tool",
+            "run",
+            "arxiv-mcp-server",
+            "--storage-path",
+            ARXIV_STORAGE_PATH,
+        ],
+    },
+    size=settings.MCP_POOL_SIZE,
+    ping_interval=settings.MCP_PING_INTERVAL,
+)
+
+# 일반 질의용 웹 검색 (원격 HTTP 서버, 도구 목록은 MCP_TOOLS_TTL마다 갱신)
+EXA_MCP_URL = "https://mcp.exa.ai/mcp?tools=web_search_exa,get_code_context_exa"
+
+exa_mcp_pool = McpSessionPool(
+    "exa",
+    {
+        "transport": "http",
+        "url": EXA_MCP_URL,
+        "httpx_client_factory": http2_client_factory,
+    },
+    size=settings.MCP_POOL_SIZE,
+    ping_interval=settings.MCP_PING_INTERVAL,
+    tools_ttl=settings.MCP_TOOLS_TTL,
+)
+
+
+if __name__ == "__main__":
+    # 질의당 MCP 준비 시간 벤치마크: 매번 새 클라이언트 vs 세션 풀 (arxiv 서버)
+    # python app/workflow/mcp_pool.py [N]
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    async def cold() -> List[BaseTool]:
+        client = MultiServerMCPClient({"arxiv": arxiv_mcp_pool.connection})
+        return await client.get_tools()
+
+    async def pooled() -> List[BaseTool]:
+        return await arxiv_mcp_pool.aget_tools()
+
+    def bench(label: str, run):
+        started = time.perf_counter()
+        for _ in range(n):
+            asyncio.run(run())
+        print(
+            f"{label:<14}{(time.perf_counter() - started) * 1000 / n:>10.1f} ms/query"
+        )
+
+    bench("new client", cold)
+    started = time.perf_counter()
+    arxiv_mcp_pool.get_tools()
+    print(
+        f"{'pool warm-up':<14}{(time.perf_counter() - started) * 1000:>10.1f} ms (once)"
+    )
+    bench("pool", pooled)
+    arxiv_mcp_pool.close()
@@ -23,3 +23,4 @@ class RootState(TypedDict):
     prev_node: Annotated[str, last_write_wins]
     next_node: Annotated[str, last_write_wins]
     rag_enabled: bool
+    active_documents: List[str]  # 검색 대상 PDF 파일명 (비어 있으면 전체)
@@ -0,0 +1,115 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+import pytest
+
+# 설정 로드에 필요한 값 (실제 API는 호출하지 않음)
+for name in (
+    "AOAI_ENDPOINT",
+    "AOAI_API_KEY",
+    "AOAI_DEPLOY_GPT4O_MINI",
+    "AOAI_DEPLOY_GPT4O",
+    "AOAI_DEPLOY_EMBED_3_LARGE",
+    "AOAI_DEPLOY_EMBED_3_SMALL",
+    "AOAI_DEPLOY_EMBED_ADA",
+    "OPENAI_API_KEY",
+    "LANGFUSE_SECRET_KEY",
+    "LANGFUSE_PUBLIC_KEY",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("LANGFUSE_BASE_URL", "http://localhost")
+os.environ["LANGFUSE_TRACING_ENABLED"] = "false"
+# 임베딩은 오프라인 결정적 백엔드 사용
+os.environ["EMBEDDING_BACKEND"] = "fake"
+
+MCP_STUB = os.path.join(os.path.dirname(__file__), "mcp_stub.py")
+
+
+def write_pdf(path: str, pages: List[str]):
+    """Write a minimal text PDF with one page per string (Helvetica, 80 chars/line)."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+    ]
+    font = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        text = text.replace("(", "").replace(")", "")
+        lines = " ".join(f"({text[j : j + 80]}) '" for j in range(0, len(text), 80))
+        ops = f"BT /F1 10 Tf 20 800 Td 12 TL {lines} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(ops)} >>\nstream\n{ops}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = "%PDF-1.4\n", []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+    out += f"startxref\n{xref}\n%%EOF\n"
+    with open(path, "w") as f:
+        f.write(out)
+
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """Fresh vector store service working under a temporary directory."""
+    from retrieval import vector_store
+
+    # 저장 경로가 상대 경로이므로 임시 디렉터리에서 실행
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(vector_store.RAW_DATA_PATH)
+    monkeypatch.setattr(vector_store.VectorStoreService, "_instance", None)
+    monkeypatch.setattr(
+        vector_store, "vector_store_service", vector_store.VectorStoreService()
+    )
+    return vector_store
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def stub_stdio():
+    """Connection that spawns the stub MCP server over stdio."""
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [MCP_STUB, "stdio"],
+        "env": {**os.environ},
+    }
+
+
+@pytest.fixture
+def stub_http():
+    """Run the stub MCP server over streamable HTTP and return its URL."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, MCP_STUB, "http", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    yield f"http://127.0.0.1:{port}/mcp"
+    # 열린 SSE 스트림이 있으면 정상 종료를 기다리지 않음
+    server.kill()
+    server.wait()
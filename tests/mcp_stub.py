@@ -0,0 +1,29 @@
+"""Local MCP server used by the MCP pool tests (same tool name as arxiv-mcp-server).
+
+python tests/mcp_stub.py [stdio|http] [PORT]
+"""
+
+import os
+import sys
+
+from mcp.server.fastmcp import FastMCP
+
+transport = sys.argv[1] if len(sys.argv) > 1 else "stdio"
+port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+stub = FastMCP("stub-arxiv", host="127.0.0.1", port=port)
+
+
+@stub.tool()
+def search_papers(query: str, max_results: int = 3) -> str:
+    """Search stub papers."""
+    return "\n".join(f"{query} paper {i}" for i in range(max_results))
+
+
+@stub.tool()
+def exit_server() -> str:
+    """Terminate the server process (crash simulation)."""
+    os._exit(1)
+
+
+if __name__ == "__main__":
+    stub.run("streamable-http" if transport == "http" else "stdio")
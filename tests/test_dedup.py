@@ -0,0 +1,121 @@
+import os
+import random
+
+import pytest
+from conftest import write_pdf
+
+WORDS = (
+    "transformer attention encoder decoder residual dropout layer norm adam "
+    "optimizer learning rate gradient batch embedding token vocabulary"
+).split()
+
+
+def random_pages(seed: int, count: int) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(300)) for _ in range(count)]
+
+
+def split_copies(vector_store):
+    """(original, duplicate) filenames after indexing two copies together.
+
+    Files are collected in the order the parser processes finish them, so
+    either copy may end up holding the chunks.
+    """
+    documents = vector_store.list_indexed_documents()
+    (duplicate,) = [name for name, doc in documents.items() if doc["duplicate_of"]]
+    return documents[duplicate]["duplicate_of"], duplicate
+
+
+@pytest.fixture
+def paper(vector_store):
+    """Write a PDF into the raw data directory and return its path."""
+
+    def make(name: str, pages: list) -> str:
+        path = os.path.join(vector_store.RAW_DATA_PATH, name)
+        write_pdf(path, pages)
+        return path
+
+    return make
+
+
+def test_copies_in_one_call_are_linked(vector_store, paper):
+    pages = random_pages(1, 3)
+    stats = vector_store.add_pdfs_to_vector_store(
+        [paper("a.pdf", pages), paper("a_copy.pdf", pages)]
+    )
+
+    original, duplicate = split_copies(vector_store)
+    documents = vector_store.list_indexed_documents()
+    chunks = documents[original]["chunks"]
+    assert chunks > 0
+    assert documents[duplicate]["chunks"] == 0
+    assert stats.duplicates == chunks
+    snapshot = vector_store.vector_store_service.snapshot()
+    assert snapshot.store.index.ntotal == chunks
+    assert set(snapshot.documents.linked_ids(duplicate)) == set(
+        snapshot.documents.ids(original)
+    )
+
+
+def test_copy_added_later_is_linked(vector_store, paper):
+    pages = random_pages(2, 3)
+    vector_store.add_pdfs_to_vector_store([paper("a.pdf", pages)])
+    stats = vector_store.add_pdfs_to_vector_store([paper("a_copy.pdf", pages)])
+
+    documents = vector_store.list_indexed_documents()
+    assert documents["a_copy.pdf"]["chunks"] == 0
+    assert documents["a_copy.pdf"]["duplicate_of"] == "a.pdf"
+    assert stats.duplicates == documents["a.pdf"]["chunks"]
+
+
+def test_repeated_text_within_a_document_is_kept(vector_store, paper):
+    page = random_pages(3, 1)[0]
+    vector_store.add_pdfs_to_vector_store([paper("a.pdf", [page, page])])
+
+    chunks = vector_store.get_document_chunks("a.pdf")
+    assert {doc.metadata["page"] for doc in chunks} == {0, 1}
+
+
+@pytest.mark.parametrize("mode", ["vector", "lexical", "hybrid"])
+def test_scoped_search_on_duplicate(vector_store, paper, mode):
+    pages = random_pages(4, 3)
+    vector_store.add_pdfs_to_vector_store(
+        [paper("a.pdf", pages), paper("a_copy.pdf", pages)]
+    )
+    original, duplicate = split_copies(vector_store)
+    source = vector_store.list_indexed_documents()[duplicate]["source"]
+
+    results = vector_store.search_pdfs(
+        "attention encoder", k=3, mode=mode, documents=[duplicate]
+    )
+    assert results
+    assert {doc.metadata["source"] for doc in results} == {source}
+
+    documents = vector_store.get_all_documents([duplicate])
+    assert len(documents) == len(vector_store.get_document_chunks(original))
+    assert {doc.metadata["source"] for doc in documents} == {source}
+
+
+def test_deleting_original_reindexes_duplicate(vector_store, paper):
+    pages = random_pages(5, 3)
+    vector_store.add_pdfs_to_vector_store(
+        [paper("a.pdf", pages), paper("a_copy.pdf", pages)]
+    )
+    original, duplicate = split_copies(vector_store)
+    documents = vector_store.list_indexed_documents()
+    chunks = documents[original]["chunks"]
+    source = documents[duplicate]["source"]
+
+    os.remove(documents[original]["source"])
+    assert vector_store.delete_document_from_vector_store(original)
+
+    documents = vector_store.list_indexed_documents()
+    assert original not in documents
+    assert documents[duplicate]["chunks"] == chunks
+    assert documents[duplicate]["duplicate_of"] is None
+    snapshot = vector_store.vector_store_service.snapshot()
+    assert snapshot.store.index.ntotal == chunks
+    results = vector_store.search_pdfs(
+        "attention encoder", k=3, mode="lexical", documents=[duplicate]
+    )
+    assert {doc.metadata["source"] for doc in results} == {source}
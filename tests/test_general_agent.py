@@ -0,0 +1,39 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from workflow.agents import general_agent
+from workflow.agents.general_agent import NO_TOOLS, GeneralAgent
+from workflow.mcp_pool import McpSessionPool
+
+
+def test_answers_without_tools_when_mcp_server_is_down(monkeypatch):
+    dead = McpSessionPool(
+        "exa",
+        {"transport": "http", "url": "http://127.0.0.1:1/mcp"},
+        size=1,
+        ping_interval=0,
+        tools_ttl=300,
+    )
+    model = GenericFakeChatModel(
+        messages=iter([AIMessage("first"), AIMessage("second")]),
+        profile={"max_input_tokens": 100_000},
+    )
+    monkeypatch.setattr(general_agent, "exa_mcp_pool", dead)
+    monkeypatch.setattr(general_agent, "get_llm", lambda: model)
+    agent = GeneralAgent()
+
+    def turn():
+        state = {"messages": [HumanMessage("hi")]}
+        return asyncio.run(agent._generate_response(state))["response"]
+
+    try:
+        assert turn() == "first"
+        assert agent._agent[0] is NO_TOOLS
+
+        # 재시도 대기 중에는 연결을 시도하지 않고 같은 도구 없는 에이전트를 재사용
+        cached = agent._agent[1]
+        assert turn() == "second"
+        assert agent._agent[1] is cached
+    finally:
+        dead.close()
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from conftest import write_pdf
+from retrieval import ingest
+
+
+@pytest.fixture
+def long_pdf(tmp_path, monkeypatch):
+    # 작은 파일로도 페이지 구간 분할 경로를 타도록 기준을 낮춤
+    monkeypatch.setattr(ingest, "STREAM_MIN_PAGES", 8)
+    monkeypatch.setattr(ingest, "PAGE_WINDOW", 4)
+    path = os.path.join(tmp_path, "long.pdf")
+    write_pdf(path, [f"page {i} " + "lorem ipsum dolor " * 120 for i in range(18)])
+    return path
+
+
+def chunks_of(batches):
+    return [
+        (doc.page_content, doc.metadata) for batch in batches for doc in batch.chunks
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_page_windows_match_whole_file(long_pdf, max_workers):
+    _, pages, expected = ingest.load_and_split(long_pdf, cached=False)
+    stats = ingest.IngestStats()
+
+    batches = list(
+        ingest.iter_chunk_batches(
+            [long_pdf], stats, batch_size=8, max_workers=max_workers, cached=False
+        )
+    )
+
+    assert chunks_of(batches) == [(doc.page_content, doc.metadata) for doc in expected]
+    assert (stats.files, stats.pages, stats.chunks) == (1, pages, len(expected))
+    checkpoints = [
+        batch.checkpoints[long_pdf]
+        for batch in batches
+        if long_pdf in batch.checkpoints
+    ]
+    assert checkpoints[-1] is None
+    assert checkpoints[:-1] == sorted(checkpoints[:-1])
+
+
+def test_resumed_file_parses_remaining_pages(long_pdf):
+    stats = ingest.IngestStats()
+
+    batches = list(
+        ingest.iter_chunk_batches(
+            [long_pdf],
+            stats,
+            max_workers=2,
+            cached=False,
+            start_pages={long_pdf: 12},
+        )
+    )
+
+    pages = {metadata["page"] for _, metadata in chunks_of(batches)}
+    assert pages == set(range(12, 18))
+    assert stats.pages == 6
+
+
+def test_text_cache_is_complete_only_after_full_parse(long_pdf, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # 이어서 파싱한 경우에는 앞쪽 페이지가 캐시에 없으므로 완료로 표시하지 않음
+    list(
+        ingest.iter_chunk_batches(
+            [long_pdf], ingest.IngestStats(), start_pages={long_pdf: 12}
+        )
+    )
+    assert len(ingest.load_pdf_pages(long_pdf)) == 18
+
+    list(ingest.iter_chunk_batches([long_pdf], ingest.IngestStats()))
+    stats = ingest.IngestStats()
+    batches = list(ingest.iter_chunk_batches([long_pdf], stats))
+    assert stats.pages == 18
+    assert len({metadata["page"] for _, metadata in chunks_of(batches)}) == 18
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from mcp.shared.exceptions import McpError
+from workflow.mcp_pool import McpSessionPool, http2_client_factory
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(connection, **kwargs):
+        kwargs.setdefault("ping_interval", 0)
+        pool = McpSessionPool("stub", connection, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def tools_by_name(pool):
+    return {tool.name: tool for tool in pool.get_tools()}
+
+
+def test_warm_up_opens_sessions_in_background(make_pool, stub_stdio):
+    pool = make_pool(stub_stdio, size=2)
+
+    started = time.perf_counter()
+    pool.warm_up()
+    assert time.perf_counter() - started < 1.0
+
+    for _ in range(300):
+        if pool._tools is not None:
+            break
+        time.sleep(0.1)
+    assert pool._tools is not None
+    assert all(slot.alive for slot in pool._slots)
+
+    # 두 번째 호출은 아무것도 하지 않음
+    pool.warm_up()
+    assert pool.get_tools() is pool._tools
+    assert pool.restarts == 0
+
+
+def test_tools_are_cached(make_pool, stub_stdio, mocker):
+    pool = make_pool(stub_stdio, size=1)
+    fetch = mocker.spy(pool, "_fetch_tools")
+
+    tools = pool.get_tools()
+    assert {tool.name for tool in tools} == {"search_papers", "exit_server"}
+    assert pool.get_tools() is tools
+    assert asyncio.run(pool.aget_tools()) is tools
+    assert fetch.call_count == 1
+
+    result = asyncio.run(tools_by_name(pool)["search_papers"].ainvoke({"query": "rag"}))
+    assert "rag paper 0" in str(result)
+
+
+def test_concurrent_callers_share_one_fetch(make_pool, stub_stdio, mocker):
+    pool = make_pool(stub_stdio, size=2)
+    fetch = mocker.spy(pool, "_fetch_tools")
+
+    async def many():
+        return await asyncio.gather(*(pool.aget_tools() for _ in range(5)))
+
+    # 이벤트 루프가 다른 여러 스레드에서 동시에 요청
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.extend(asyncio.run(many())))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 15
+    assert all(tools is results[0] for tools in results)
+    assert fetch.call_count == 1
+
+
+def test_crashed_server_is_restarted(make_pool, stub_stdio):
+    pool = make_pool(stub_stdio, size=2)
+    tools = tools_by_name(pool)
+
+    # 모든 세션의 서버 프로세스를 종료시킴 (재시도에서도 다시 종료됨)
+    # 응답 전에 세션이 끝나면 ConnectionError, 전송 계층이 먼저 닫히면 McpError
+    for _ in range(pool.size):
+        with pytest.raises((ConnectionError, McpError)):
+            asyncio.run(tools["exit_server"].ainvoke({}))
+    assert pool.restarts == pool.size
+
+    result = asyncio.run(tools["search_papers"].ainvoke({"query": "rag"}))
+    assert "rag paper 0" in str(result)
+    assert pool.restarts == pool.size + 1
+
+
+def test_tools_are_refreshed_after_ttl(make_pool, stub_http, mocker):
+    pool = make_pool(
+        {
+            "transport": "http",
+            "url": stub_http,
+            "httpx_client_factory": http2_client_factory,
+        },
+        size=1,
+        tools_ttl=0.2,
+    )
+    fetch = mocker.spy(pool, "_fetch_tools")
+
+    tools = pool.get_tools()
+    assert pool.get_tools() is tools
+    assert fetch.call_count == 1
+
+    # 만료 후 다시 조회하지만 스키마가 같으면 같은 리스트를 유지
+    time.sleep(0.3)
+    assert pool.get_tools() is tools
+    assert fetch.call_count == 2